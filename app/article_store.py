@@ -0,0 +1,72 @@
+from app.cache import TTLCache
+from typing import Optional
+import app.config as config
+import time
+
+
+class ArticleStore:
+    """
+    Extracted article text keyed by the final URL after redirects, together with
+    the validators needed for conditional GETs. Requested URLs are stored as
+    aliases of the final URL so a repeat fetch can skip the redirect chain.
+    """
+
+    def __init__(
+        self,
+        freshness: float = config.ARTICLE_FRESHNESS,
+        ttl: float = config.ARTICLE_STORE_TTL,
+        max_items: int = config.ARTICLE_STORE_SIZE,
+        max_db_items: int = config.ARTICLE_STORE_DB_SIZE,
+    ):
+        self.freshness = freshness
+        self._cache = TTLCache("articles", max_items=max_items, ttl=ttl, max_db_items=max_db_items)
+        self.fresh_hits = 0
+        self.not_modified = 0
+        self.downloads = 0
+
+    async def lookup(self, url: str) -> Optional[dict]:
+        final_url = await self._cache.get("alias:" + url) or url
+        return await self._cache.get("article:" + final_url)
+
+    def is_fresh(self, record: dict) -> bool:
+        return time.time() - record["fetched_at"] < self.freshness
+
+    def conditional_headers(self, record: dict) -> dict:
+        headers = {}
+        if record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    async def save(self, url: str, final_url: str, text: str, etag: Optional[str], last_modified: Optional[str]):
+        self.downloads += 1
+        record = {
+            "url": final_url,
+            "text": text,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        await self._cache.set("article:" + final_url, record)
+        if url != final_url:
+            await self._cache.set("alias:" + url, final_url)
+
+    async def touch(self, record: dict):
+        """Mark a record as fresh again after a 304 Not Modified."""
+        self.not_modified += 1
+        await self._cache.set("article:" + record["url"], {**record, "fetched_at": time.time()})
+
+    def close(self):
+        self._cache.close()
+
+    def stats(self) -> dict:
+        return {
+            "fresh_hits": self.fresh_hits,
+            "not_modified": self.not_modified,
+            "downloads": self.downloads,
+            "cache": self._cache.stats(),
+        }
+
+
+article_store = ArticleStore()
@@ -0,0 +1,166 @@
+"""
+Bulk analysis through the OpenAI Batch API.
+
+For large offline runs (e.g. the monthly report across the whole portfolio)
+the prompts from app.prompts are packed into a batch JSONL file, submitted,
+polled until done and mapped back to the caller's ids. Batch jobs are cheaper
+and not subject to the interactive rate limits, but can take up to 24h.
+
+    python -m app.batch_analyzer posts.json --language ch --out results.json
+
+where posts.json maps an id (post or article URL) to its text.
+"""
+from openai import AsyncOpenAI
+from app.cache import analysis_cache
+from app.token_budget import truncate_to_budget
+from app.utils import is_valid_analysis
+import app.config as config
+import app.openai_analyzer as openai_analyzer
+import app.prompts as prompts
+import argparse
+import asyncio
+import json
+
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_batch_file(items: dict[str, str], language: str) -> bytes:
+    """One /v1/responses request per item, tagged with the item id as custom_id."""
+    lines = []
+    for custom_id, text in items.items():
+        lines.append(json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/responses",
+            "body": {
+                "model": openai_analyzer.MODEL,
+                "instructions": prompts.LIInstruction,
+                "input": openai_analyzer.prepare_prompt(
+                    truncate_to_budget(text, openai_analyzer.count_tokens), language
+                ),
+            },
+        }, ensure_ascii=False))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def output_text(body: dict) -> str:
+    """Equivalent of `Response.output_text` for a raw /v1/responses body."""
+    texts = []
+    for output in body.get("output", []):
+        for content in output.get("content") or []:
+            if content.get("type") == "output_text":
+                texts.append(content.get("text", ""))
+    return "".join(texts)
+
+
+def parse_batch_output(raw: str) -> dict[str, str]:
+    results = {}
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            print(f"Batch request {record.get('custom_id')} failed: {record.get('error') or response}")
+            continue
+        results[record["custom_id"]] = output_text(response.get("body") or {})
+    return results
+
+
+async def run_batch(
+    items: dict[str, str],
+    language: str,
+    client: AsyncOpenAI,
+    poll_interval: float,
+) -> dict[str, str]:
+    batch_file = await client.files.create(
+        file=("analysis.jsonl", build_batch_file(items, language)),
+        purpose="batch",
+    )
+    batch = await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/responses",
+        completion_window="24h",
+    )
+    print(f"Submitted batch {batch.id} with {len(items)} requests")
+
+    while batch.status not in TERMINAL_STATUSES:
+        await asyncio.sleep(poll_interval)
+        batch = await client.batches.retrieve(batch.id)
+        if batch.request_counts:
+            counts = batch.request_counts
+            print(f"Batch {batch.id}: {batch.status} ({counts.completed}/{counts.total} done, {counts.failed} failed)")
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}: {batch.errors}")
+
+    content = await client.files.content(batch.output_file_id)
+    return parse_batch_output(content.text)
+
+
+async def analyze_posts_batch(
+    items: dict[str, str],
+    language: str,
+    client: AsyncOpenAI = openai_analyzer.client,
+    poll_interval: float = config.BATCH_POLL_INTERVAL,
+) -> dict[str, str]:
+    """
+    Analyze many texts with the Batch API.
+
+    Args:
+        items (dict[str, str]): id -> post or article text
+        language (str): "ch" or "en", as for analyze_posts
+        client (AsyncOpenAI): point `base_url` at tests.fake_batch_server to run locally
+
+    Returns:
+        dict[str, str]: id -> raw model reply (same format as analyze_posts); ids
+        whose request failed are left out
+    """
+    results = {}
+    pending = {}
+    keys = {}
+    # Anything already analyzed interactively comes straight from the analysis cache
+    for item_id, text in items.items():
+        keys[item_id] = openai_analyzer.analysis_key(text, language)
+        cached = await analysis_cache.get(keys[item_id])
+        if cached is not None and is_valid_analysis(cached):
+            results[item_id] = cached
+        else:
+            pending[item_id] = text
+
+    ids = list(pending)
+    for start in range(0, len(ids), config.BATCH_MAX_REQUESTS):
+        chunk = {item_id: pending[item_id] for item_id in ids[start:start + config.BATCH_MAX_REQUESTS]}
+        for item_id, response in (await run_batch(chunk, language, client, poll_interval)).items():
+            results[item_id] = response
+            if is_valid_analysis(response):
+                await analysis_cache.set(keys[item_id], response)
+
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Analyze posts/articles with the OpenAI Batch API")
+    parser.add_argument("input", help="JSON file mapping ids to texts")
+    parser.add_argument("--language", default="ch", choices=["ch", "en"])
+    parser.add_argument("--out", default="batch_results.json")
+    parser.add_argument("--base-url", default=None, help="e.g. http://127.0.0.1:8001/v1 for the fake batch server")
+    parser.add_argument("--poll-interval", type=float, default=config.BATCH_POLL_INTERVAL)
+    args = parser.parse_args()
+
+    with open(args.input, encoding="utf-8") as f:
+        items = json.load(f)
+
+    client = openai_analyzer.client
+    if args.base_url:
+        client = AsyncOpenAI(api_key=client.api_key, base_url=args.base_url)
+
+    results = await analyze_posts_batch(items, args.language, client, args.poll_interval)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {len(results)}/{len(items)} results to {args.out}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,205 @@
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright, Browser, BrowserContext
+from typing import AsyncIterator, Optional
+import app.config as config
+import asyncio
+import time
+
+
+class PooledBrowser:
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.active = 0  # contexts currently handed out
+        self.pages_served = 0
+        self.peak_heap_mb = 0.0
+        self.retiring = False
+        self.ready = True
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "pages_served": self.pages_served,
+            "peak_heap_mb": round(self.peak_heap_mb, 1),
+            "retiring": self.retiring,
+            "ready": self.ready,
+        }
+
+
+class BrowserPool:
+    """
+    Keeps a bounded set of warm Chromium processes and hands out one isolated
+    BrowserContext per request. Requests queue when every slot is busy, and a
+    browser is relaunched once it has served `max_pages` pages or a page's JS
+    heap grew past `max_heap_mb`.
+    """
+
+    def __init__(
+        self,
+        size: int = config.BROWSER_POOL_SIZE,
+        contexts_per_browser: int = config.BROWSER_CONTEXTS_PER_BROWSER,
+        max_pages: int = config.BROWSER_MAX_PAGES,
+        max_heap_mb: int = config.BROWSER_MAX_HEAP_MB,
+        headless: bool = config.BROWSER_HEADLESS,
+    ):
+        self.size = size
+        self.contexts_per_browser = contexts_per_browser
+        self.max_pages = max_pages
+        self.max_heap_mb = max_heap_mb
+        self.headless = headless
+
+        self._playwright = None
+        self._browsers: list[PooledBrowser] = []
+        self._cond = asyncio.Condition()
+        self._start_lock = asyncio.Lock()
+
+        self._waiting = 0
+        self._acquired = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recycled = 0
+
+    async def start(self):
+        async with self._start_lock:
+            if self._playwright:
+                return
+            self._playwright = await async_playwright().start()
+            try:
+                for _ in range(self.size):
+                    self._browsers.append(PooledBrowser(await self._launch()))
+            except Exception:
+                # Leave the pool unstarted so the next context() tries again
+                for entry in self._browsers:
+                    try:
+                        await entry.browser.close()
+                    except Exception as e:
+                        print(f"Error closing browser: {e}")
+                self._browsers = []
+                await self._playwright.stop()
+                self._playwright = None
+                raise
+
+    async def stop(self):
+        async with self._start_lock:
+            if not self._playwright:
+                return
+            for entry in self._browsers:
+                try:
+                    await entry.browser.close()
+                except Exception as e:
+                    print(f"Error closing browser: {e}")
+            self._browsers = []
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self) -> Browser:
+        return await self._playwright.chromium.launch(headless=self.headless)
+
+    def _pick(self) -> Optional[PooledBrowser]:
+        candidates = [b for b in self._browsers if b.ready and b.active < self.contexts_per_browser]
+        if not candidates:
+            return None
+        # Prefer browsers that are not due for recycling, then the least busy one
+        return min(candidates, key=lambda b: (b.retiring, b.active))
+
+    @asynccontextmanager
+    async def context(self, **context_options) -> AsyncIterator[BrowserContext]:
+        """Borrow an isolated browser context; waits in line if the pool is full."""
+        if not self._playwright:
+            await self.start()
+
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._pick() is not None)
+                entry = self._pick()
+                entry.active += 1
+                # Checked under the lock so only one borrower relaunches a crashed browser
+                relaunch = not entry.browser.is_connected()
+                if relaunch:
+                    entry.ready = False
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - started
+        self._acquired += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+        context = None
+        try:
+            if relaunch:
+                await self._recycle(entry)
+            context = await entry.browser.new_context(**context_options)
+            context.on("page", lambda _: self._count_page(entry))
+            yield context
+        finally:
+            if context is not None:
+                await self._measure_heap(entry, context)
+                try:
+                    await context.close()
+                except Exception as e:
+                    print(f"Error closing browser context: {e}")
+            await self._release(entry)
+
+    def _count_page(self, entry: PooledBrowser):
+        entry.pages_served += 1
+        if entry.pages_served >= self.max_pages:
+            entry.retiring = True
+
+    async def _measure_heap(self, entry: PooledBrowser, context: BrowserContext):
+        for page in context.pages:
+            try:
+                used = await page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : 0")
+            except Exception:
+                continue
+            entry.peak_heap_mb = max(entry.peak_heap_mb, used / (1024 * 1024))
+        if entry.peak_heap_mb >= self.max_heap_mb:
+            entry.retiring = True
+
+    async def _release(self, entry: PooledBrowser):
+        async with self._cond:
+            entry.active -= 1
+            recycle = entry.retiring and entry.active == 0 and entry.ready
+            if recycle:
+                entry.ready = False
+            self._cond.notify_all()
+
+        if recycle:
+            await self._recycle(entry)
+
+    async def _recycle(self, entry: PooledBrowser):
+        """Relaunch an entry the caller marked not ready under the lock, then hand it out again."""
+        try:
+            await self._relaunch(entry)
+        finally:
+            async with self._cond:
+                entry.ready = True
+                self._cond.notify_all()
+
+    async def _relaunch(self, entry: PooledBrowser):
+        try:
+            await entry.browser.close()
+        except Exception as e:
+            print(f"Error closing browser: {e}")
+        entry.browser = await self._launch()
+        entry.pages_served = 0
+        entry.peak_heap_mb = 0.0
+        entry.retiring = False
+        self._recycled += 1
+
+    def stats(self) -> dict:
+        in_use = sum(b.active for b in self._browsers)
+        return {
+            "capacity": self.size * self.contexts_per_browser,
+            "in_use": in_use,
+            "waiting": self._waiting,
+            "acquired": self._acquired,
+            "avg_wait_ms": round(self._total_wait / self._acquired * 1000, 1) if self._acquired else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 1),
+            "recycled": self._recycled,
+            "browsers": [b.stats() for b in self._browsers],
+        }
+
+
+browser_pool = BrowserPool()
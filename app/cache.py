@@ -0,0 +1,170 @@
+from collections import OrderedDict
+from typing import Any, Optional
+import app.config as config
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def make_key(*parts) -> str:
+    """Content-addressed cache key: sha256 over the JSON encoding of `parts`."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    Two-level cache for JSON-serialisable values: an in-process LRU in front of
+    an optional SQLite file. Both levels expire entries after `ttl` seconds
+    (None keeps them forever) and evict the oldest ones past their size bound.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        max_items: int = 1024,
+        ttl: Optional[float] = None,
+        db_path: Optional[str] = config.CACHE_DB_PATH,
+        max_db_items: int = 50000,
+    ):
+        self.namespace = namespace
+        self.max_items = max_items
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_db_items = max_db_items
+
+        self._memory: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    # ---- SQLite layer (runs in a worker thread) ----
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT, key TEXT, value TEXT, stored_at REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_age ON cache (namespace, stored_at)")
+            self._db.commit()
+        return self._db
+
+    def _db_get(self, key: str) -> Optional[tuple[float, str]]:
+        with self._db_lock:
+            row = self._connect().execute(
+                "SELECT stored_at, value FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        return row
+
+    def _db_set(self, key: str, stored_at: float, value: str):
+        with self._db_lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, value, stored_at),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._db_evict(db)
+            db.commit()
+
+    def _db_delete(self, key: str):
+        with self._db_lock:
+            db = self._connect()
+            db.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+            db.commit()
+
+    def _db_evict(self, db: sqlite3.Connection):
+        if self.ttl is not None:
+            db.execute(
+                "DELETE FROM cache WHERE namespace = ? AND stored_at < ?",
+                (self.namespace, time.time() - self.ttl),
+            )
+        db.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            "SELECT key FROM cache WHERE namespace = ? ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_db_items),
+        )
+
+    # ---- public API ----
+
+    def _remember(self, key: str, stored_at: float, value: Any):
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    async def get_entry(self, key: str) -> Optional[tuple[float, Any]]:
+        """Return (stored_at, value) for a live entry, or None."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            if not self._expired(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+            del self._memory[key]
+
+        if self.db_path:
+            row = await asyncio.to_thread(self._db_get, key)
+            if row is not None and not self._expired(row[0]):
+                entry = (row[0], json.loads(row[1]))
+                self._remember(key, *entry)
+                self.disk_hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    async def get(self, key: str) -> Any:
+        entry = await self.get_entry(key)
+        return entry[1] if entry is not None else None
+
+    async def set(self, key: str, value: Any):
+        stored_at = time.time()
+        self._remember(key, stored_at, value)
+        if self.db_path:
+            await asyncio.to_thread(self._db_set, key, stored_at, json.dumps(value, ensure_ascii=False))
+
+    async def delete(self, key: str):
+        self._memory.pop(key, None)
+        if self.db_path:
+            await asyncio.to_thread(self._db_delete, key)
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "persistent": bool(self.db_path),
+        }
+
+
+analysis_cache = TTLCache(
+    "analysis",
+    max_items=config.ANALYSIS_CACHE_SIZE,
+    ttl=config.ANALYSIS_CACHE_TTL,
+    max_db_items=config.ANALYSIS_CACHE_DB_SIZE,
+)
@@ -0,0 +1,103 @@
+from typing import Any, Awaitable, Callable, Hashable
+from app.request_context import DeadlineExceeded, SharedDeadline, deadline, time_left
+import asyncio
+
+
+class SharedCall:
+    """
+    One piece of work several callers wait on. It runs under a SharedDeadline,
+    the latest deadline of the callers still waiting, so it neither inherits
+    the deadline of whichever caller started it nor outlives all of them:
+    once the last caller gives up (deadline or cancellation) it is cancelled.
+    """
+
+    def __init__(self, factory: Callable[[], Awaitable[Any]]):
+        self.deadline = SharedDeadline()
+        self.abandoned = False
+        self.future = asyncio.ensure_future(self._run(factory))
+
+    async def _run(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        deadline.set(self.deadline)
+        return await factory()
+
+    async def wait(self) -> Any:
+        """The work's result, or DeadlineExceeded once the caller's own deadline passes."""
+        waiter = deadline.get()
+        self.deadline.waiters.append(waiter)
+        try:
+            while True:
+                left = time_left()
+                if left is not None and left <= 0:
+                    raise DeadlineExceeded("request deadline exceeded while waiting for shared work")
+                # asyncio.wait neither cancels the work on timeout nor when this caller is cancelled
+                done, _ = await asyncio.wait({self.future}, timeout=left)
+                if done:
+                    return self.future.result()
+        finally:
+            self.deadline.waiters.remove(waiter)
+            if not self.deadline.waiters and not self.future.done():
+                self.abandoned = True
+                self.future.cancel()
+
+
+class TaskMemo:
+    """
+    Runs each distinct key once and hands every caller the same result. Used to
+    share scraping, fetching and analysis across the companies of one bulk run.
+    Work every caller gave up on is started again by the next one.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, SharedCall] = {}
+        self.hits = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is not None and not call.abandoned:
+            self.hits += 1
+        else:
+            call = self._calls[key] = SharedCall(factory)
+        return await call.wait()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller starts the
+    work and everyone arriving while it is in flight awaits the same result.
+    Unlike TaskMemo nothing is kept once the call finishes; the caches handle that.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: dict[Hashable, SharedCall] = {}
+        self.calls = 0
+        self.shared = 0
+        self.abandoned = 0
+        flights.append(self)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._in_flight.get(key)
+        if call is None or call.abandoned:
+            self.calls += 1
+            call = self._in_flight[key] = SharedCall(factory)
+            call.future.add_done_callback(lambda _: self._done(key, call))
+        else:
+            self.shared += 1
+        return await call.wait()
+
+    def _done(self, key: Hashable, call: SharedCall):
+        if call.abandoned:
+            self.abandoned += 1
+        if self._in_flight.get(key) is call:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "shared": self.shared,
+            "abandoned": self.abandoned,
+        }
+
+
+flights: list[SingleFlight] = []
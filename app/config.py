@@ -0,0 +1,130 @@
+import os
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+# Playwright browser pool
+BROWSER_HEADLESS = _bool("BROWSER_HEADLESS", True)
+BROWSER_POOL_SIZE = _int("BROWSER_POOL_SIZE", 2)  # warm Chromium processes
+BROWSER_CONTEXTS_PER_BROWSER = _int("BROWSER_CONTEXTS_PER_BROWSER", 2)  # concurrent requests per browser
+BROWSER_MAX_PAGES = _int("BROWSER_MAX_PAGES", 50)  # recycle a browser after serving this many pages
+BROWSER_MAX_HEAP_MB = _int("BROWSER_MAX_HEAP_MB", 512)  # recycle when a page's JS heap grows past this
+
+# Shared httpx client
+HTTP_MAX_CONNECTIONS = _int("HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE = _int("HTTP_MAX_KEEPALIVE", 20)
+HTTP_KEEPALIVE_EXPIRY = _float("HTTP_KEEPALIVE_EXPIRY", 30.0)
+HTTP_MAX_PER_HOST = _int("HTTP_MAX_PER_HOST", 2)  # concurrent requests to one host
+HTTP2 = _bool("HTTP2", False)  # needs the `h2` package
+HTTP_HOST_SPACING = _float("HTTP_HOST_SPACING", 0.5)  # minimum seconds between request starts to one host
+HTTP_HOST_RETRIES = _int("HTTP_HOST_RETRIES", 2)  # retries after a 429/503
+HTTP_HOST_BACKOFF_BASE = _float("HTTP_HOST_BACKOFF_BASE", 2.0)  # seconds, doubled per consecutive 429/503
+HTTP_HOST_BACKOFF_MAX = _float("HTTP_HOST_BACKOFF_MAX", 60.0)
+HTTP_HOST_MAX_WAIT = _float("HTTP_HOST_MAX_WAIT", 30.0)  # give up instead of waiting longer than this on a paused host
+
+# Caches (set CACHE_DB_PATH to also persist them in SQLite)
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH")
+ANALYSIS_CACHE_SIZE = _int("ANALYSIS_CACHE_SIZE", 2048)  # in-memory entries
+ANALYSIS_CACHE_DB_SIZE = _int("ANALYSIS_CACHE_DB_SIZE", 50000)  # on-disk entries
+ANALYSIS_CACHE_TTL = _float("ANALYSIS_CACHE_TTL", 31 * 24 * 3600)  # seconds
+
+# Fetched-article store
+ARTICLE_STORE_SIZE = _int("ARTICLE_STORE_SIZE", 1000)
+ARTICLE_STORE_DB_SIZE = _int("ARTICLE_STORE_DB_SIZE", 20000)
+ARTICLE_STORE_TTL = _float("ARTICLE_STORE_TTL", 31 * 24 * 3600)  # drop stored articles after this
+ARTICLE_FRESHNESS = _float("ARTICLE_FRESHNESS", 6 * 3600)  # serve without revalidating for this long
+
+# Parsed Google News result pages
+SERP_CACHE_ENABLED = _bool("SERP_CACHE_ENABLED", True)
+SERP_CACHE_SIZE = _int("SERP_CACHE_SIZE", 500)
+SERP_CACHE_DB_SIZE = _int("SERP_CACHE_DB_SIZE", 10000)
+SERP_CACHE_FRESHNESS = _float("SERP_CACHE_FRESHNESS", 3600)  # serve without asking Google for this long
+SERP_CACHE_TTL = _float("SERP_CACHE_TTL", 24 * 3600)  # until then serve stale pages while refreshing in the background
+
+# Google News result pages
+GOOGLE_SEARCH_URL = os.getenv("GOOGLE_SEARCH_URL", "https://www.google.com/search")  # point at tests.fake_serp_server to benchmark
+# Result pages requested at once; 1 fetches them one by one. Pages still start HTTP_HOST_SPACING
+# apart on one host, so raise this only together with a smaller spacing (see scripts/bench_serp.py)
+SERP_CONCURRENT_PAGES = _int("SERP_CONCURRENT_PAGES", 1)
+
+# Search -> fetch -> analyze pipeline
+PIPELINE_FETCH_WORKERS = _int("PIPELINE_FETCH_WORKERS", 8)
+PIPELINE_ANALYZE_WORKERS = _int("PIPELINE_ANALYZE_WORKERS", 8)
+PIPELINE_QUEUE_SIZE = _int("PIPELINE_QUEUE_SIZE", 16)  # items buffered in front of each stage
+REQUEST_DEADLINE = _float("REQUEST_DEADLINE", 120.0)  # seconds before news/combined requests return what they have; 0 waits for everything
+
+# LLM request scheduling (per provider budgets)
+OPENAI_RPM = _int("OPENAI_RPM", 500)
+OPENAI_TPM = _int("OPENAI_TPM", 200000)
+GEMINI_RPM = _int("GEMINI_RPM", 2000)
+GEMINI_TPM = _int("GEMINI_TPM", 4000000)
+LLM_OUTPUT_TOKENS = _int("LLM_OUTPUT_TOKENS", 500)  # reserved per call for the reply
+LLM_MAX_RETRIES = _int("LLM_MAX_RETRIES", 5)
+LLM_BACKOFF_BASE = _float("LLM_BACKOFF_BASE", 1.0)  # seconds, doubled per retry
+LLM_BACKOFF_MAX = _float("LLM_BACKOFF_MAX", 60.0)
+LLM_HEDGE = _bool("LLM_HEDGE", False)  # send a backup copy of calls slower than the recent p95
+LLM_HEDGE_MIN_SAMPLES = _int("LLM_HEDGE_MIN_SAMPLES", 20)  # latencies seen before hedging starts
+LLM_HEDGE_MIN_DELAY = _float("LLM_HEDGE_MIN_DELAY", 2.0)  # never hedge sooner than this, in seconds
+
+# Input size control (see app.token_budget)
+LLM_INPUT_BUDGET = _int("LLM_INPUT_BUDGET", 3000)  # tokens of post/article text per call; 0 disables
+LLM_MAP_REDUCE = _bool("LLM_MAP_REDUCE", False)  # summarize very long inputs chunk by chunk first
+LLM_MAP_REDUCE_THRESHOLD = _int("LLM_MAP_REDUCE_THRESHOLD", 12000)  # tokens
+LLM_MAP_REDUCE_CHUNK = _int("LLM_MAP_REDUCE_CHUNK", 4000)  # tokens per summarized chunk
+LLM_SUMMARY_TOKENS = _int("LLM_SUMMARY_TOKENS", 400)  # reserved per chunk summary
+
+# Batch API analysis (offline runs)
+BATCH_POLL_INTERVAL = _float("BATCH_POLL_INTERVAL", 30.0)  # seconds between status checks
+BATCH_MAX_REQUESTS = _int("BATCH_MAX_REQUESTS", 50000)  # provider limit per batch file
+
+# Packing several short posts into one LLM call
+PACK_MAX_ITEMS = _int("PACK_MAX_ITEMS", 8)
+PACK_MAX_TOKENS = _int("PACK_MAX_TOKENS", 3000)  # input tokens per packed call
+PACK_MAX_ITEM_TOKENS = _int("PACK_MAX_ITEM_TOKENS", 400)  # longer texts are analyzed on their own
+
+# /bulk-digest
+BULK_COMPANY_CONCURRENCY = _int("BULK_COMPANY_CONCURRENCY", 4)  # companies processed at once
+
+# Background jobs
+JOB_WORKERS = _int("JOB_WORKERS", 2)  # jobs running at once
+JOB_TTL = _float("JOB_TTL", 3600)  # keep finished jobs (and their results) this long
+
+# Seen LinkedIn posts per company (incremental scraping)
+FEED_STORE_SIZE = _int("FEED_STORE_SIZE", 500)  # companies kept in memory
+FEED_STORE_TTL = _float("FEED_STORE_TTL", 366 * 24 * 3600)
+
+# LinkedIn feed scrolling
+LINKEDIN_HARVEST = _bool("LINKEDIN_HARVEST", True)  # batch card extraction per scroll step
+LINKEDIN_MAX_SCROLLS = _int("LINKEDIN_MAX_SCROLLS", 50)
+LINKEDIN_SCROLL_WAIT_MS = _int("LINKEDIN_SCROLL_WAIT_MS", 3000)  # give up when no new cards load within this
+LINKEDIN_PAGE_PROFILE = os.getenv("LINKEDIN_PAGE_PROFILE", "light")  # off, light or minimal (see app.page_profile)
+
+# HTML extraction backend (see app.html_parser)
+HTML_PARSER = os.getenv("HTML_PARSER", "auto")  # auto, html.parser, lxml or selectolax
+
+# Article extraction runs in worker processes; 0 extracts inline on the event loop
+EXTRACT_WORKERS = _int("EXTRACT_WORKERS", min(4, os.cpu_count() or 1))
+EXTRACT_MAX_PENDING = _int("EXTRACT_MAX_PENDING", 32)  # pages submitted to the pool at once
+EXTRACT_MAX_BYTES = _int("EXTRACT_MAX_BYTES", 2 * 1024 * 1024)  # longer pages are cut before parsing
+
+# Article downloads are streamed and stop at whichever limit comes first
+ARTICLE_MAX_BYTES = _int("ARTICLE_MAX_BYTES", 2 * 1024 * 1024)  # hard cap on bytes read per article
+ARTICLE_TEXT_TARGET = _int("ARTICLE_TEXT_TARGET", 20000)  # stop once this much <p> text has arrived; 0 reads to the cap
+
+# Articles with no funding/partnership/launch/award wording are classified "None" without an LLM call
+PREFILTER_ENABLED = _bool("PREFILTER_ENABLED", True)
+
+# Near-duplicate articles/posts within one request are analyzed once (see app.dedup)
+DEDUP_ENABLED = _bool("DEDUP_ENABLED", True)
+DEDUP_MAX_DISTANCE = _int("DEDUP_MAX_DISTANCE", 6)  # differing SimHash bits (of 64) still counted as the same story
+DEDUP_MIN_TOKENS = _int("DEDUP_MIN_TOKENS", 30)  # shorter texts are never treated as duplicates
@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from typing import Optional
+import app.config as config
+import asyncio
+import hashlib
+import numpy as np
+import re
+
+
+# Words for alphabetic scripts, single characters for CJK
+TOKEN = re.compile(r"[^\W_]+|[⺀-￿]")
+CJK = re.compile(r"[⺀-￿]")
+SHINGLE_SIZE = 3
+
+dedup_stats = {
+    "texts": 0,
+    "duplicates": 0,
+}
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in TOKEN.findall(text.lower()):
+        # \w matches a whole run of CJK characters, so split those up
+        tokens.extend(CJK.findall(token) if CJK.match(token) else [token])
+    return tokens
+
+
+def simhash(tokens: list[str]) -> int:
+    """64-bit SimHash over overlapping word (or CJK character) 3-grams."""
+    shingles = (" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1)))
+    digests = b"".join(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest() for shingle in shingles)
+    hashes = np.frombuffer(digests, dtype=">u8")
+    # Count the set bits per position across all shingles at once rather than 64 Python steps per shingle
+    ones = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=0)
+    # unpackbits gives the most significant bit first
+    return sum(1 << (63 - position) for position in np.flatnonzero(2 * ones > len(hashes)).tolist())
+
+
+@dataclass
+class Cluster:
+    url: str
+    fingerprint: int
+    alternates: list[str] = field(default_factory=list)
+
+
+class NearDuplicateIndex:
+    """
+    Clusters the texts of one request by SimHash so syndicated copies of the
+    same story are analyzed once. The first text of a cluster is its
+    representative; later near-duplicates only add their URL to its
+    `alternates`. Texts shorter than `min_tokens` (error messages, one-line
+    posts) are never clustered.
+    """
+
+    def __init__(self, max_distance: int = config.DEDUP_MAX_DISTANCE, min_tokens: int = config.DEDUP_MIN_TOKENS):
+        self.max_distance = max_distance
+        self.min_tokens = min_tokens
+        self.clusters: list[Cluster] = []
+
+    def fingerprint(self, text: str) -> Optional[int]:
+        tokens = tokenize(text)
+        return simhash(tokens) if len(tokens) >= self.min_tokens else None
+
+    async def add(self, url: str, text: str) -> Optional[Cluster]:
+        """Returns the new cluster `url` represents, or None when it joined an existing one."""
+        dedup_stats["texts"] += 1
+        # Hashing every shingle of a long article takes tens of ms; keep it off the event loop
+        fingerprint = await asyncio.to_thread(self.fingerprint, text)
+        if fingerprint is None:
+            return Cluster(url, 0)
+
+        for cluster in self.clusters:
+            if (cluster.fingerprint ^ fingerprint).bit_count() <= self.max_distance:
+                dedup_stats["duplicates"] += 1
+                print(f"{url} is a near-duplicate of {cluster.url}")
+                cluster.alternates.append(url)
+                return None
+
+        cluster = Cluster(url, fingerprint)
+        self.clusters.append(cluster)
+        return cluster
@@ -0,0 +1,91 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from app.html_parser import extract_article_bytes
+import app.config as config
+import asyncio
+import multiprocessing
+import time
+
+
+class ExtractionPool:
+    """
+    Runs article extraction in a ProcessPoolExecutor so parsing large pages
+    neither blocks the event loop nor is limited to one core. At most
+    `max_pending` pages are handed to the pool at once and each is cut to
+    `max_bytes` before it is pickled across.
+    """
+
+    def __init__(
+        self,
+        workers: int = config.EXTRACT_WORKERS,
+        max_pending: int = config.EXTRACT_MAX_PENDING,
+        max_bytes: int = config.EXTRACT_MAX_BYTES,
+    ):
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = asyncio.Semaphore(max(1, max_pending))
+        self._extractions = 0
+        self._truncated = 0
+        self._restarts = 0
+        self._busy_seconds = 0.0
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking the running app would copy its event loop, threads and Playwright
+            # state into the workers; forkserver (spawn where unavailable) starts them clean
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(method))
+        return self._executor
+
+    async def extract_article(self, raw: bytes, encoding: Optional[str] = None) -> Optional[str]:
+        """Text of an article page from its raw bytes, or None when it has no content container."""
+        if len(raw) > self.max_bytes:
+            self._truncated += 1
+            raw = raw[:self.max_bytes]
+
+        if self.workers <= 0:
+            return self._run_inline(raw, encoding)
+
+        async with self._pending:
+            started = time.perf_counter()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.executor, extract_article_bytes, raw, encoding
+                )
+            except BrokenProcessPool:
+                # A worker died (OOM, segfault in a C parser); start a fresh pool next time
+                print("Extraction worker died, restarting the process pool")
+                self._restarts += 1
+                self._executor = None
+                raise
+            finally:
+                self._extractions += 1
+                self._busy_seconds += time.perf_counter() - started
+
+    def _run_inline(self, raw: bytes, encoding: Optional[str]) -> Optional[str]:
+        started = time.perf_counter()
+        try:
+            return extract_article_bytes(raw, encoding)
+        finally:
+            self._extractions += 1
+            self._busy_seconds += time.perf_counter() - started
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "extractions": self._extractions,
+            "truncated": self._truncated,
+            "restarts": self._restarts,
+            "avg_wall_ms": round(1000 * self._busy_seconds / self._extractions, 2) if self._extractions else 0.0,
+        }
+
+
+extraction_pool = ExtractionPool()
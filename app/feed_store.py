@@ -0,0 +1,71 @@
+from app.cache import TTLCache
+from app.models import PostData
+from app.utils import get_post_id, is_valid_analysis
+import app.config as config
+import asyncio
+
+
+class FeedStore:
+    """
+    Posts already scraped from each company's LinkedIn feed, keyed by the
+    19-digit post id, together with the LLM analysis per language (only
+    replies with a known category are kept). The scraper stops scrolling once
+    it reaches a stored post of the requested month or earlier, so repeat
+    runs only extract and analyze what is new.
+    """
+
+    def __init__(self, max_items: int = config.FEED_STORE_SIZE, ttl: float = config.FEED_STORE_TTL):
+        self._cache = TTLCache("feeds", max_items=max_items, ttl=ttl)
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.new_posts = 0
+        self.reused_posts = 0
+        self.reused_analyses = 0
+
+    def _lock(self, company: str) -> asyncio.Lock:
+        return self._locks.setdefault(company, asyncio.Lock())
+
+    async def load(self, company: str) -> dict[str, dict]:
+        """post id -> {"url", "text", "img_links", "analyses": {language: response}}"""
+        return dict(await self._cache.get(company) or {})
+
+    async def add_posts(self, company: str, posts: list[PostData]):
+        if not posts:
+            return
+        async with self._lock(company):
+            records = await self.load(company)
+            for post in posts:
+                post_id = get_post_id(post.url)
+                if not post_id:
+                    continue
+                previous = records.get(post_id)
+                # Keep earlier analyses unless the post was edited since
+                analyses = previous["analyses"] if previous and previous["text"] == post.text else {}
+                records[post_id] = {**post.model_dump(), "analyses": analyses}
+            self.new_posts += len(posts)
+            await self._cache.set(company, records)
+
+    async def save_analysis(self, company: str, post: PostData, language: str, response: str):
+        # A bad reply would otherwise be reused for as long as the post is stored
+        if not is_valid_analysis(response):
+            return
+        post_id = get_post_id(post.url)
+        async with self._lock(company):
+            records = await self.load(company)
+            if post_id not in records:
+                return
+            records[post_id]["analyses"][language] = response
+            await self._cache.set(company, records)
+
+    def close(self):
+        self._cache.close()
+
+    def stats(self) -> dict:
+        return {
+            "new_posts": self.new_posts,
+            "reused_posts": self.reused_posts,
+            "reused_analyses": self.reused_analyses,
+            "cache": self._cache.stats(),
+        }
+
+
+feed_store = FeedStore()
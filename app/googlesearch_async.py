@@ -1,15 +1,37 @@
+from app.article_store import article_store
+from app.coalesce import SingleFlight
+from app.extraction_pool import extraction_pool
+from app.html_parser import ParagraphMeter, extract_serp_results
+from app.http_client import http_client
 from app.models import GoogleNewsResponse
+from app.request_context import DeadlineExceeded, within_deadline
+from app.serp_cache import serp_cache
+from contextlib import nullcontext
+from dataclasses import dataclass
 from fastapi import HTTPException
 import httpx
-from bs4 import BeautifulSoup
 from urllib.parse import unquote
 from fake_headers import Headers
 from datetime import datetime
 from typing import AsyncGenerator, Optional
+import app.config as config
 import asyncio
 import random
 
 
+article_flight = SingleFlight("articles")
+
+# Content types worth parsing as articles; a missing header is given the benefit of the doubt
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+download_stats = {
+    "downloads": 0,
+    "bytes_read": 0,
+    "rejected_type": 0,
+    "over_budget": 0,
+    "stopped_early": 0,
+}
+
 
 class SearchResult:
     def __init__(self, url: str, title: str, description: str):
@@ -20,6 +42,18 @@ class SearchResult:
     def __repr__(self):
         return f"SearchResult(url={self.url}, title={self.title}, description={self.description})"
 
+
+@dataclass
+class FetchResult:
+    """Outcome of fetching one article: its text on success, or why there is none."""
+    url: str
+    text: str = ""
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 def tbs_format(month: Optional[int]) -> Optional[str]:
     if month is None:
         return month
@@ -67,71 +101,87 @@ async def search(
     region: Optional[str] = None,
     start_num: int = 0,
     unique: bool = False,
-    month: Optional[int] = None
+    month: Optional[int] = None,
+    concurrent_pages: int = config.SERP_CONCURRENT_PAGES,
 ) -> AsyncGenerator[SearchResult | str, None]:
-    """Async version of Google search"""
+    """
+    Async version of Google search.
+
+    Up to `concurrent_pages` result pages are requested at once; their
+    results are still yielded in page order. Pages come from serp_cache when
+    possible (searches through a proxy always go to Google).
+    """
     
-    proxies = {"https": proxy, "http": proxy} if proxy and (proxy.startswith("https") or proxy.startswith("http")) else None
+    proxy = proxy if proxy and (proxy.startswith("https") or proxy.startswith("http")) else None
     start = start_num
     fetched_results = 0
     fetched_links = set()
 
-    async with httpx.AsyncClient(proxy=proxies, timeout=timeout) as client:
-        while fetched_results < num_results:
+    # httpx binds proxies to a client, so only proxied searches get their own connection pool
+    client_cm = httpx.AsyncClient(proxy=proxy) if proxy else nullcontext(http_client)
+    # A background refresh may outlive a proxied search's client
+    use_cache = config.SERP_CACHE_ENABLED and not proxy
+
+    async with client_cm as client:
+
+        async def fetch_page(page_start: int) -> list[tuple[str, str, str]]:
+            params = {
+                "tbm": "nws",
+                "q": term,
+                "num": num_results + 2,
+                "hl": lang,
+                "start": page_start,
+                "safe": safe,
+                "gl": region,
+                "tbs": tbs_format(month),
+            }
+            print(params)
+            resp = await client.get(
+                config.GOOGLE_SEARCH_URL,
+                headers={
+                        "User-Agent": await get_useragent(),
+                        "Accept": "*/*"
+                },
+                params=params,
+                cookies={
+                    'CONSENT': 'PENDING+987',
+                    'SOCS': 'CAESHAgBEhIaAB',
+                },
+                timeout=within_deadline(timeout),
+            )
+            resp.raise_for_status()
+            return extract_serp_results(resp.text)
+
+        async def get_page(page_start: int) -> list[tuple[str, str, str]]:
+            if not use_cache:
+                return await fetch_page(page_start)
+            key = serp_cache.key(term, tbs_format(month), lang, region, safe, page_start)
+            return await serp_cache.page(key, lambda: fetch_page(page_start))
+
+        finished = False
+        while fetched_results < num_results and not finished:
+            # Request the pages still needed (10 results each, up to the cap) together
+            pages_needed = -(-(num_results - fetched_results) // 10)
+            starts = [start + 10 * i for i in range(max(1, min(pages_needed, concurrent_pages)))]
+            pages = [asyncio.ensure_future(get_page(page_start)) for page_start in starts]
             try:
-                print({
-                        "tbm": "nws",
-                        "q": term,
-                        "num": num_results + 2,
-                        "hl": lang,
-                        "start": start,
-                        "safe": safe,
-                        "gl": region,
-                        "tbs": tbs_format(month),
-                    })
-                resp = await client.get(
-                    "https://www.google.com/search",
-                    headers={
-                            "User-Agent": await get_useragent(),
-                            "Accept": "*/*"
-                    },
-                    params={
-                        "tbm": "nws",
-                        "q": term,
-                        "num": num_results + 2,
-                        "hl": lang,
-                        "start": start,
-                        "safe": safe,
-                        "gl": region,
-                        "tbs": tbs_format(month),
-                    },
-                    cookies={
-                        'CONSENT': 'PENDING+987',
-                        'SOCS': 'CAESHAgBEhIaAB',
-                    }
-                )
-                resp.raise_for_status()
-
-                soup = BeautifulSoup(resp.text, "html.parser")
-                # print(soup)
-                result_block = soup.find_all("div", class_="ezO2md")
-                new_results = 0
-                # print('result_block:', result_block)
-                for result in result_block:
-                    print('fetched_links:', fetched_links)
-                    link_tag = result.find("a", href=True)
-                    title_tag = link_tag.find("span", class_="CVA68e") if link_tag else None
-                    description_tag = result.find("span", class_="FrIlee")
-
-                    if link_tag and title_tag and description_tag:
-                        link = unquote(link_tag["href"].split("&")[0].replace("/url?q=", ""))
+                for page in pages:
+                    try:
+                        results = await page
+                    except Exception as e:
+                        print(f"Error during search: {e}")
+                        finished = True
+                        break
+
+                    new_results = 0
+                    for href, title, description in results:
+                        print('fetched_links:', fetched_links)
+                        link = unquote(href.split("&")[0].replace("/url?q=", ""))
                         
                         if link in fetched_links and unique:
                             continue
                             
                         fetched_links.add(link)
-                        title = title_tag.text if title_tag else ""
-                        description = description_tag.text if description_tag else ""
                         
                         fetched_results += 1
                         new_results += 1
@@ -145,16 +195,18 @@ async def search(
                         if fetched_results >= num_results:
                             break
 
-                if new_results == 0:
-                    break
+                    # Later pages of this batch are past the end of the results
+                    if new_results == 0 or fetched_results >= num_results:
+                        finished = True
+                        break
+            finally:
+                for page in pages:
+                    page.cancel()
 
-                start += 10
+            start += 10 * len(starts)
+            if not finished:
                 await asyncio.sleep(sleep_interval)
 
-            except Exception as e:
-                print(f"Error during search: {e}")
-                break 
-
 
 async def scrape_search_results(req: GoogleNewsResponse):
     try:
@@ -175,78 +227,104 @@ async def scrape_search_results(req: GoogleNewsResponse):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def scrape_news_content(url: str, timeout: int = 10) -> str:
+async def scrape_news_content(url: str, timeout: int = 10) -> FetchResult:
     """
     Scrapes news content from a given URL with intelligent site-specific handling.
+    Concurrent calls for the same URL share a single fetch.
     
     Args:
         url (str): The URL of the news article to scrape
         timeout (int): Timeout in seconds for the HTTP request
         
     Returns:
-        str: The extracted news content text
+        FetchResult: The extracted news content text, or the error that prevented it
+    """
+    return await article_flight.do(url, lambda: _scrape_news_content(url, timeout))
+
+
+async def read_article_body(resp: httpx.Response) -> bytes:
     """
+    Read a streamed article body up to ARTICLE_MAX_BYTES, stopping early once
+    about ARTICLE_TEXT_TARGET bytes of paragraph text have come in.
+    """
+    meter = ParagraphMeter()
+    chunks, size = [], 0
+    async for chunk in resp.aiter_bytes():
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= config.ARTICLE_MAX_BYTES:
+            download_stats["over_budget"] += 1
+            break
+        if config.ARTICLE_TEXT_TARGET and meter.feed(chunk) >= config.ARTICLE_TEXT_TARGET:
+            download_stats["stopped_early"] += 1
+            break
+    download_stats["downloads"] += 1
+    download_stats["bytes_read"] += min(size, config.ARTICLE_MAX_BYTES)
+    return b"".join(chunks)[:config.ARTICLE_MAX_BYTES]
+
+
+async def _scrape_news_content(url: str, timeout: int) -> FetchResult:
     try:
-        async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
-            # headers = {
-            #     "User-Agent": await get_useragent(),
-            #     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            #     "Accept-Language": "en-US,en;q=0.5",
-            # }
-            
-            resp = await client.get(url, headers=Headers().generate())
+        # Serve recently fetched articles without touching the network
+        record = await article_store.lookup(url)
+        if record and article_store.is_fresh(record):
+            article_store.fresh_hits += 1
+            return FetchResult(url, record["text"])
+
+        # headers = {
+        #     "User-Agent": await get_useragent(),
+        #     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        #     "Accept-Language": "en-US,en;q=0.5",
+        # }
+        timeout = within_deadline(timeout)
+        headers = Headers().generate()
+        target_url = url
+        if record:
+            # Revalidate the stored copy at its final URL, skipping the redirect chain
+            headers.update(article_store.conditional_headers(record))
+            target_url = record["url"]
+
+        async with http_client.stream(target_url, headers=headers, timeout=timeout, follow_redirects=True) as resp:
+            if resp.status_code == 304 and record:
+                await article_store.touch(record)
+                return FetchResult(url, record["text"])
             resp.raise_for_status()
-            
+
             # If we got redirected, get the final URL
             final_url = str(resp.url)
-            if final_url != url:
+            if final_url != target_url:
                 print(f"Redirected from {url} to {final_url}")
 
-            # print(final_url)
-            
-            soup = BeautifulSoup(resp.text, "html.parser")
-            
-            # Remove unwanted elements
-            for element in soup.find_all(['script', 'style', 'nav', 'footer', 'header']):
-                element.decompose()
-            
-            # Common article content selectors
-            content_selectors = [
-                'article',  # Common article container
-                '.article-content',  # Generic article content
-                '.post-content',  # Blog posts
-                '.entry-content',  # WordPress
-                '.story-body',  # News sites
-                '#article-body',  # ID-based selectors
-                '.article-body',
-                '.article__body',
-                '.article-text',
-                '.article-content',
-                'main',  # Main content area
-                '.content',  # Generic content
-            ]
-            
-            # Try each selector until we find content
-            content = None
-            for selector in content_selectors:
-                content = soup.select_one(selector)
-                if content:
-                    break
-            
-            # If no specific content found, try to get the main text
-            if not content:
-                content = soup.find('body')
-            
-            if content:
-                # Get all paragraphs
-                paragraphs = content.find_all('p')
-                # Filter out short paragraphs (likely navigation or ads)
-                text = '\n'.join(p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 50)
-                # print('Text:', text, '-'*100)
-                return text
+            # Don't download PDFs, images etc. only to find no <p> in them
+            content_type = resp.headers.get("content-type", "")
+            if content_type and content_type.split(";")[0].strip().lower() not in HTML_CONTENT_TYPES:
+                download_stats["rejected_type"] += 1
+                print(f"Skipping {final_url}: not an HTML page ({content_type})")
+                return FetchResult(url, error=f"Unsupported content type: {content_type}")
+
+            raw = await read_article_body(resp)
+            encoding = resp.encoding
+
+        # print(final_url)
+        
+        # Parsing happens off the event loop, in the extraction worker processes
+        text = await extraction_pool.extract_article(raw, encoding)
+        if text is None:
             print("Could not extract content from the page", '\n', '-'*100)
-            return "Could not extract content from the page"
-            
+            return FetchResult(url, error="Could not extract content from the page")
+        if not text:
+            return FetchResult(url, error="No article paragraphs found on the page")
+        # print('Text:', text, '-'*100)
+        await article_store.save(
+            url, final_url, text,
+            etag=resp.headers.get("etag"),
+            last_modified=resp.headers.get("last-modified"),
+        )
+        return FetchResult(url, text)
+        
+    except DeadlineExceeded:
+        # Not worth analyzing an error string; the pipeline drops the article
+        raise
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 302:
             redirect_url = e.response.headers.get('location')
@@ -254,7 +332,7 @@ async def scrape_news_content(url: str, timeout: int = 10) -> str:
                 print(f"Handling 302 redirect to: {redirect_url}")
                 return await scrape_news_content(redirect_url, timeout)
         print(f"HTTP error scraping {url}: {e}")
-        return f"HTTP error: {str(e)}"
+        return FetchResult(url, error=f"HTTP error: {str(e)}")
     except Exception as e:
         print(f"Error scraping {url}: {e}")
-        return f"Error scraping content: {str(e)}"
\ No newline at end of file
+        return FetchResult(url, error=f"Error scraping content: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+HTML extraction for Google News result pages and news articles, behind a
+choice of parser backends:
+
+- "html.parser": BeautifulSoup with the pure-Python parser (always available)
+- "lxml": BeautifulSoup on the lxml C parser, same extraction code
+- "selectolax": the Lexbor C parser via selectolax, much faster still
+
+HTML_PARSER=auto picks the fastest installed one; requirements.txt pins
+selectolax. scripts/bench_html_parsers.py checks output parity against
+html.parser and times each backend, by default on scripts/html_corpus.
+"""
+from bs4 import BeautifulSoup
+from typing import Optional
+import app.config as config
+import re
+
+
+# Containers tried in order to find the article body
+CONTENT_SELECTORS = [
+    'article',  # Common article container
+    '.article-content',  # Generic article content
+    '.post-content',  # Blog posts
+    '.entry-content',  # WordPress
+    '.story-body',  # News sites
+    '#article-body',  # ID-based selectors
+    '.article-body',
+    '.article__body',
+    '.article-text',
+    '.article-content',
+    'main',  # Main content area
+    '.content',  # Generic content
+]
+
+# Removed before looking for content
+NOISE_TAGS = ['script', 'style', 'nav', 'footer', 'header']
+
+# Paragraphs this short are usually navigation or ads
+MIN_PARAGRAPH_LENGTH = 50
+
+# lxml and Lexbor add a <body> to any document; html.parser only sees one that is in the markup
+_BODY_TAG = re.compile(r"<body[\s>]", re.IGNORECASE)
+
+
+def _has_module(name: str) -> bool:
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends() -> list[str]:
+    backends = ["html.parser"]
+    if _has_module("lxml"):
+        backends.append("lxml")
+    if _has_module("selectolax"):
+        backends.append("selectolax")
+    return backends
+
+
+def resolve_backend(backend: str = config.HTML_PARSER) -> str:
+    available = available_backends()
+    if backend == "auto":
+        return available[-1]
+    if backend not in available:
+        print(f"HTML parser backend {backend} is not installed, using html.parser")
+        return "html.parser"
+    return backend
+
+
+BACKEND = resolve_backend()
+
+
+# ---- Google News result page ----
+
+def extract_serp_results(html: str, backend: Optional[str] = None) -> list[tuple[str, str, str]]:
+    """Return (raw href, title, description) for every complete result block."""
+    backend = backend or BACKEND
+    if backend == "selectolax":
+        return _serp_selectolax(html)
+    return _serp_soup(html, backend)
+
+
+def _serp_soup(html: str, backend: str) -> list[tuple[str, str, str]]:
+    soup = BeautifulSoup(html, backend)
+    results = []
+    for result in soup.find_all("div", class_="ezO2md"):
+        link_tag = result.find("a", href=True)
+        title_tag = link_tag.find("span", class_="CVA68e") if link_tag else None
+        description_tag = result.find("span", class_="FrIlee")
+        if link_tag and title_tag and description_tag:
+            results.append((link_tag["href"], title_tag.text, description_tag.text))
+    return results
+
+
+def _serp_selectolax(html: str) -> list[tuple[str, str, str]]:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    results = []
+    for result in tree.css("div.ezO2md"):
+        link_tag = result.css_first("a[href]")
+        title_tag = link_tag.css_first("span.CVA68e") if link_tag else None
+        description_tag = result.css_first("span.FrIlee")
+        if link_tag and title_tag and description_tag:
+            results.append((link_tag.attributes["href"], title_tag.text(), description_tag.text()))
+    return results
+
+
+# ---- News article ----
+
+def extract_article_text(html: str, backend: Optional[str] = None) -> Optional[str]:
+    """
+    Join the substantial <p> paragraphs of the article body. Returns None when
+    the page has no recognisable content container (not even <body>).
+    """
+    backend = backend or BACKEND
+    if backend == "selectolax":
+        paragraphs = _paragraphs_selectolax(html)
+    else:
+        paragraphs = _paragraphs_soup(html, backend)
+    if paragraphs is None:
+        return None
+    return '\n'.join(p for p in paragraphs if len(p) > MIN_PARAGRAPH_LENGTH)
+
+
+def extract_article_bytes(raw: bytes, encoding: Optional[str] = None, backend: Optional[str] = None) -> Optional[str]:
+    """
+    Pure bytes-in, text-out version of extract_article_text, so it can run in
+    a worker process (see app.extraction_pool).
+    """
+    return extract_article_text(raw.decode(encoding or "utf-8", errors="replace"), backend)
+
+
+_PARAGRAPH_OPEN = re.compile(rb"<p[\s>]", re.IGNORECASE)
+_PARAGRAPH_CLOSE = re.compile(rb"</p\s*>", re.IGNORECASE)
+_TAG = re.compile(rb"<[^>]*>")
+
+# An unclosed <p> is legal HTML; give up on one after this many bytes
+MAX_OPEN_PARAGRAPH = 64 * 1024
+
+
+class ParagraphMeter:
+    """
+    Rough running count of paragraph text in an HTML download, fed chunk by
+    chunk, so the download can stop once there is enough to analyze. Only
+    closed <p> elements longer than MIN_PARAGRAPH_LENGTH are counted (in
+    bytes); it does not know about noise tags, so it errs on the high side.
+    Each byte is searched about once, and an opening <p> with no </p> within
+    MAX_OPEN_PARAGRAPH bytes is dropped, so feeding stays linear.
+    """
+
+    def __init__(self):
+        self.buffer = b""
+        self.in_paragraph = False  # buffer starts with an opening <p
+        self.scanned = 0  # bytes of buffer already searched for </p
+        self.text_bytes = 0
+
+    def feed(self, chunk: bytes) -> int:
+        self.buffer += chunk
+        while True:
+            if not self.in_paragraph:
+                opening = _PARAGRAPH_OPEN.search(self.buffer)
+                if not opening:
+                    # Keep a few bytes in case an opening tag straddles two chunks
+                    self.buffer = self.buffer[-8:]
+                    return self.text_bytes
+                self.buffer = self.buffer[opening.start():]
+                self.in_paragraph = True
+                self.scanned = 0
+
+            # Re-search a few bytes in case the closing tag straddles two chunks
+            closing = _PARAGRAPH_CLOSE.search(self.buffer, max(3, self.scanned - 8))
+            if not closing:
+                if len(self.buffer) > MAX_OPEN_PARAGRAPH:
+                    # No </p> anywhere in the buffer, so no <p> in it can close either
+                    self.buffer = self.buffer[-8:]
+                    self.in_paragraph = False
+                else:
+                    self.scanned = len(self.buffer)
+                return self.text_bytes
+
+            text = _TAG.sub(b"", self.buffer[:closing.end()]).strip()
+            if len(text) > MIN_PARAGRAPH_LENGTH:
+                self.text_bytes += len(text)
+            self.buffer = self.buffer[closing.end():]
+            self.in_paragraph = False
+
+
+def _paragraphs_soup(html: str, backend: str) -> Optional[list[str]]:
+    soup = BeautifulSoup(html, backend)
+
+    # Remove unwanted elements
+    for element in soup.find_all(NOISE_TAGS):
+        element.decompose()
+
+    # Try each selector until we find content
+    content = None
+    for selector in CONTENT_SELECTORS:
+        content = soup.select_one(selector)
+        if content:
+            break
+
+    # If no specific content found, try to get the main text
+    if not content and (backend == "html.parser" or _BODY_TAG.search(html)):
+        content = soup.find('body')
+    if not content:
+        return None
+    return [p.get_text().strip() for p in content.find_all('p')]
+
+
+def _paragraphs_selectolax(html: str) -> Optional[list[str]]:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(NOISE_TAGS)
+
+    content = None
+    for selector in CONTENT_SELECTORS:
+        content = tree.css_first(selector)
+        if content:
+            break
+
+    if not content and _BODY_TAG.search(html):
+        content = tree.body
+    if not content:
+        return None
+    return [p.text().strip() for p in content.css('p')]
@@ -0,0 +1,183 @@
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from urllib.parse import urlparse
+from app.rate_limiter import parse_retry_after
+from app.request_context import DeadlineExceeded, time_left
+import app.config as config
+import asyncio
+import httpx
+import random
+import time
+
+
+# Statuses that mean "slow down": the host is paused and the request retried
+THROTTLE_STATUS = {429, 503}
+
+# How soon to look again at a host whose request slots are all taken
+HOST_BUSY_RECHECK = 0.1
+
+
+class HostThrottled(Exception):
+    """The host asked us to back off for longer than we are willing to wait."""
+
+
+@dataclass
+class HostState:
+    slots: asyncio.Semaphore
+    next_start: float = 0.0  # earliest time the next request may start (politeness spacing)
+    paused_until: float = 0.0  # set by 429/503 responses
+    failures: int = 0  # consecutive throttled responses
+    throttled: int = 0
+
+
+def h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class SharedClient:
+    """
+    One app-scoped httpx.AsyncClient so search pages and article fetches reuse
+    warm keep-alive (optionally HTTP/2) connections, plus per-host politeness
+    since httpx.Limits only bounds the whole pool: a cap on concurrent
+    requests, a minimum spacing between request starts, and a pause with
+    jittered exponential backoff (or the server's Retry-After) after a 429 or
+    503, after which the request is retried. Waiting on one host never holds
+    up requests to another.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = config.HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = config.HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = config.HTTP_KEEPALIVE_EXPIRY,
+        max_per_host: int = config.HTTP_MAX_PER_HOST,
+        http2: bool = config.HTTP2,
+        host_spacing: float = config.HTTP_HOST_SPACING,
+        host_retries: int = config.HTTP_HOST_RETRIES,
+        host_max_wait: float = config.HTTP_HOST_MAX_WAIT,
+    ):
+        if http2 and not h2_available():
+            print("HTTP2 requested but the `h2` package is not installed, falling back to HTTP/1.1")
+            http2 = False
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_per_host = max_per_host
+        self.http2 = http2
+        self.host_spacing = host_spacing
+        self.host_retries = host_retries
+        self.host_max_wait = host_max_wait
+        self._client: Optional[httpx.AsyncClient] = None
+        self._hosts: dict[str, HostState] = {}
+        self._in_flight: dict[str, int] = defaultdict(int)
+        self._requests = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, http2=self.http2)
+        return self._client
+
+    def _host(self, url: str) -> tuple[str, HostState]:
+        host = urlparse(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = HostState(asyncio.Semaphore(self.max_per_host))
+        return host, self._hosts[host]
+
+    def host_ready_in(self, url: str) -> float:
+        """Roughly how many seconds a request to `url` made now would wait for host_slot."""
+        _, state = self._host(url)
+        wait = max(state.next_start, state.paused_until) - time.monotonic()
+        if state.slots.locked():
+            wait = max(wait, HOST_BUSY_RECHECK)
+        return max(wait, 0.0)
+
+    @asynccontextmanager
+    async def host_slot(self, url: str) -> AsyncIterator[None]:
+        host, state = self._host(url)
+        async with state.slots:
+            while True:
+                # Reserve a start time before sleeping so concurrent waiters stay spaced out
+                now = time.monotonic()
+                start = max(now, state.next_start, state.paused_until)
+                if start - now > self.host_max_wait:
+                    raise HostThrottled(f"{host} asked us to back off for {start - now:.0f}s")
+                left = time_left()
+                if left is not None and start - now > left:
+                    raise DeadlineExceeded(f"{host} is not available before the request deadline")
+                state.next_start = start + self.host_spacing
+                if start <= now:
+                    break
+                await asyncio.sleep(start - now)
+                # A 429/503 may have paused the host while we slept
+                if state.paused_until <= time.monotonic():
+                    break
+
+            self._in_flight[host] += 1
+            try:
+                yield
+            finally:
+                self._in_flight[host] -= 1
+                if not self._in_flight[host]:
+                    del self._in_flight[host]
+
+    def _observe(self, url: str, response: httpx.Response) -> bool:
+        """Track throttling responses; returns True when the request should be retried."""
+        host, state = self._host(url)
+        if response.status_code not in THROTTLE_STATUS:
+            state.failures = 0
+            return False
+
+        state.failures += 1
+        state.throttled += 1
+        delay = parse_retry_after(response.headers.get("retry-after"))
+        if delay is None:
+            # Full jitter, as for the LLM scheduler
+            delay = random.uniform(0, min(config.HTTP_HOST_BACKOFF_MAX, config.HTTP_HOST_BACKOFF_BASE * 2 ** state.failures))
+        state.paused_until = max(state.paused_until, time.monotonic() + delay)
+        print(f"{host} answered {response.status_code}, pausing it for {delay:.1f}s")
+        return True
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        for attempt in range(self.host_retries + 1):
+            async with self.host_slot(url):
+                self._requests += 1
+                response = await self.client.get(url, **kwargs)
+            if not self._observe(url, response) or attempt == self.host_retries:
+                return response
+
+    @asynccontextmanager
+    async def stream(self, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """GET `url` without reading the body; the host slot is held until the block exits."""
+        for attempt in range(self.host_retries + 1):
+            async with self.host_slot(url):
+                self._requests += 1
+                async with self.client.stream("GET", url, **kwargs) as response:
+                    if not self._observe(url, response) or attempt == self.host_retries:
+                        yield response
+                        return
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {
+            "http2": self.http2,
+            "requests": self._requests,
+            "in_flight": dict(self._in_flight),
+            "throttled": {host: state.throttled for host, state in self._hosts.items() if state.throttled},
+        }
+
+
+http_client = SharedClient()
@@ -0,0 +1,146 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+from app.cache import make_key
+from app.request_context import deadline, request_id
+import app.config as config
+import asyncio
+import time
+import uuid
+
+
+class Job:
+    def __init__(self, kind: str, key: str, runner: Callable[["Job"], Awaitable[Any]]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.runner = runner
+        self.status = "queued"  # queued -> running -> done / failed
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.events: list[dict] = []
+        self._updated = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    async def emit(self, event: str, **data):
+        """Record a progress event for pollers and stream listeners."""
+        self.events.append({"event": event, "at": time.time(), **data})
+        async with self._updated:
+            self._updated.notify_all()
+
+    async def stream_events(self) -> AsyncIterator[dict]:
+        """Replay past events, then follow new ones until the job finishes."""
+        sent = 0
+        while True:
+            while sent < len(self.events):
+                yield self.events[sent]
+                sent += 1
+            if self.finished:
+                return
+            async with self._updated:
+                await self._updated.wait_for(lambda: sent < len(self.events) or self.finished)
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "events": len(self.events),
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    In-process job queue for long digests: submit returns right away, a fixed
+    number of workers run the jobs, and submitting a request identical to one
+    that is still queued or running returns that job instead of a new one.
+    """
+
+    def __init__(self, workers: int = config.JOB_WORKERS, ttl: float = config.JOB_TTL):
+        self.workers = workers
+        self.ttl = ttl
+        self._jobs: dict[str, Job] = {}
+        self._active: dict[str, Job] = {}  # request key -> queued/running job
+        self._queue: asyncio.Queue[Job] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self.attached = 0
+
+    async def start(self):
+        self._ensure_workers()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _ensure_workers(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    def _purge(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+
+    def submit(self, kind: str, payload: dict, runner: Callable[[Job], Awaitable[Any]]) -> tuple[Job, bool]:
+        """Queue `runner(job)`; returns (job, attached) where attached means an identical job was reused."""
+        self._purge()
+        key = make_key(kind, payload)
+        if key in self._active:
+            self.attached += 1
+            return self._active[key], True
+
+        job = Job(kind, key, runner)
+        self._jobs[job.id] = job
+        self._active[key] = job
+        self._ensure_workers()
+        self._queue.put_nowait(job)
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            # LLM calls of each job are scheduled fairly against the others
+            request_id.set(job.id)
+            deadline.set(None)
+            job.status = "running"
+            job.started_at = time.time()
+            await job.emit("started")
+            try:
+                job.result = await job.runner(job)
+                job.status = "done"
+            except Exception as e:
+                print(f"Job {job.id} failed: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                self._active.pop(job.key, None)
+            await job.emit(job.status, error=job.error)
+
+    def stats(self) -> dict:
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "workers": self.workers,
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "done": statuses.count("done"),
+            "failed": statuses.count("failed"),
+            "attached": self.attached,
+        }
+
+
+job_manager = JobManager()
@@ -1,65 +1,171 @@
-from playwright.async_api import async_playwright
 from datetime import datetime
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from app.browser_pool import BrowserPool, browser_pool
 from app.models import PostData
-from app.utils import get_date_from_url
+from app.page_profile import PROFILES, ResourceBlocker, scrape_totals
+from app.utils import get_date_from_url, get_post_id
+from typing import Optional
+import app.config as config
+
+
+FEED_CARD = 'div[data-id="entire-feed-card-link"]'
+
+# Extract every card not harvested yet in one round trip, mark it, and scroll to the bottom card
+HARVEST_JS = """
+(selector) => {
+    const fresh = Array.from(document.querySelectorAll(selector + ':not([data-harvested])'));
+    const cards = fresh.map(card => {
+        card.setAttribute('data-harvested', '1');
+        const link = card.querySelector('a[data-id="main-feed-card__full-link"]');
+        return {
+            url: link ? (link.getAttribute('href') || '') : '',
+            text: card.innerText,
+            img_links: Array.from(card.querySelectorAll('img'))
+                .map(img => img.getAttribute('src') || img.getAttribute('data-delayed-url'))
+                .filter(Boolean),
+        };
+    });
+    const all = document.querySelectorAll(selector);
+    if (all.length) {
+        all[all.length - 1].scrollIntoView({block: 'end'});
+    }
+    return {cards: cards, total: all.length};
+}
+"""
+
+MORE_CARDS_JS = "([selector, count]) => document.querySelectorAll(selector).length > count"
+
+
+async def scrape_linkedin_posts(
+    url: str,
+    month: int,
+    pool: BrowserPool = browser_pool,
+    known_ids: Optional[set[str]] = None,
+    harvest: bool = config.LINKEDIN_HARVEST,
+    profile: str = config.LINKEDIN_PAGE_PROFILE,
+) -> list[PostData]:
+    """
+    Scrape the posts of `month` from a LinkedIn feed. Posts whose id is in
+    `known_ids` are skipped, and scrolling stops once the feed reaches one of
+    them from `month` or earlier (see reached_known).
+    `profile` names an app.page_profile.PROFILES entry controlling which
+    requests the page may make.
+    """
+    known_ids = known_ids or set()
+    blocker = ResourceBlocker(PROFILES[profile])
+
+    async with pool.context() as context:
+        await blocker.attach(context)
+        try:
+            page = await context.new_page()
+            await page.goto(url)
+            #  ('await page.goto(url)')
+
+            if harvest:
+                return await harvest_posts(page, month, known_ids)
+            return await scroll_then_collect_posts(page, month, known_ids)
+        finally:
+            scrape_totals.add(blocker)
+            print(f"Scraped {url}: {blocker.stats()}")
+
+
+async def harvest_posts(page: Page, month: int, known_ids: set[str]) -> list[PostData]:
+    """
+    Scroll the feed and extract new cards as they appear, one page.evaluate per
+    scroll step, instead of re-querying every card and its images separately.
+    """
+    post_data_list = []
+    for _ in range(config.LINKEDIN_MAX_SCROLLS):
+        batch = await page.evaluate(HARVEST_JS, FEED_CARD)
+        cards = batch["cards"]
+        if not cards:
+            break
+
+        stop = False
+        for card in cards:
+            if get_post_id(card["url"]) in known_ids:
+                stop = stop or reached_known(card["url"], month, known_ids)
+                continue
+            if check_time_in_month(get_date_from_url(card["url"]), month):
+                post_data_list.append(PostData(url=card["url"], text=card["text"], img_links=card["img_links"]))
+
+        # The feed is newest first: stop at posts we already have or once it is past the month
+        if stop or check_before_month(get_date_from_url(cards[-1]["url"]), month):
+            break
+
+        try:
+            await page.wait_for_function(MORE_CARDS_JS, arg=[FEED_CARD, batch["total"]], timeout=config.LINKEDIN_SCROLL_WAIT_MS)
+        except PlaywrightTimeoutError:
+            break  # no new cards loaded: end of the feed
+
+    return post_data_list
 
 
-async def scrape_linkedin_posts(url: str, month: int, headless: bool = True) -> list[PostData]:
+async def scroll_then_collect_posts(page: Page, month: int, known_ids: set[str]) -> list[PostData]:
     post_data_list = []
 
-    async with async_playwright() as p:
-        # print('async with async_playwright() as p:')
-
-        browser = await p.chromium.launch(headless=headless)
-        page = await browser.new_page()
-        await page.goto(url)
-        #  ('await page.goto(url)')
-
-        loop_limit = 0
-        while True:
-            loop_limit += 1
-            if loop_limit > 50:
-                break
-
-            posts = await page.query_selector_all('div[data-id="entire-feed-card-link"]')
-            # print(f"posts = {posts}")
-            if not posts:
-                break
-
-            last_post = posts[-1]
-            post_url = await get_post_url(last_post)
-            utc_date = get_date_from_url(post_url)
-
-            if not check_time_in_month(utc_date, month):
-                break
-
-            await last_post.scroll_into_view_if_needed()
-            # print(len(posts), loop_limit)
-
-        # 收集目標月份的貼文
-        for post in posts:
-            post_url = await get_post_url(post)
-            utc_date = get_date_from_url(post_url)
-            if check_time_in_month(utc_date, month):
-                # get texts
-                text = await post.inner_text()
-
-                # get img urls
-                img_eles = await post.query_selector_all("img")
-                img_links = []
-                for img in img_eles:
-                    src = await img.get_attribute("src")
-                    if src:
-                        img_links.append(src)
-                
-                # organize results
-                post_data_list.append(PostData(url=post_url, text=text, img_links=img_links))
-
-        await browser.close()
+    loop_limit = 0
+    while True:
+        loop_limit += 1
+        if loop_limit > config.LINKEDIN_MAX_SCROLLS:
+            break
+
+        posts = await page.query_selector_all(FEED_CARD)
+        # print(f"posts = {posts}")
+        if not posts:
+            break
+
+        last_post = posts[-1]
+        post_url = await get_post_url(last_post)
+        utc_date = get_date_from_url(post_url)
+
+        if not check_time_in_month(utc_date, month):
+            break
+
+        # Everything above a post we have already seen is loaded by now
+        if reached_known(post_url, month, known_ids):
+            break
+
+        await last_post.scroll_into_view_if_needed()
+        # print(len(posts), loop_limit)
+
+    # 收集目標月份的貼文
+    for post in posts:
+        post_url = await get_post_url(post)
+        if get_post_id(post_url) in known_ids:
+            continue
+        utc_date = get_date_from_url(post_url)
+        if check_time_in_month(utc_date, month):
+            # get texts
+            text = await post.inner_text()
+
+            # get img urls
+            img_eles = await post.query_selector_all("img")
+            img_links = []
+            for img in img_eles:
+                src = await img.get_attribute("src")
+                if src:
+                    img_links.append(src)
+            
+            # organize results
+            post_data_list.append(PostData(url=post_url, text=text, img_links=img_links))
 
     return post_data_list
 
 
+def reached_known(post_url: str, month: int, known_ids: set[str]) -> bool:
+    """
+    True for a stored post from `month` or earlier: everything below it was
+    seen by the scrape that stored it. Stored posts from later months (left
+    by scraping a newer month) say nothing about `month`, so they are
+    scrolled past.
+    """
+    if get_post_id(post_url) not in known_ids:
+        return False
+    utc_date = get_date_from_url(post_url)
+    return check_time_in_month(utc_date, month) or check_before_month(utc_date, month)
+
+
 def check_time_in_month(utc_date: str, month: int) -> bool:
     try:
         post_time = datetime.strptime(utc_date, '%a, %d %b %Y %H:%M:%S GMT')
@@ -68,6 +174,14 @@ def check_time_in_month(utc_date: str, month: int) -> bool:
         return False
 
 
+def check_before_month(utc_date: str, month: int) -> bool:
+    try:
+        post_time = datetime.strptime(utc_date, '%a, %d %b %Y %H:%M:%S GMT')
+        return (post_time.year, post_time.month) < (datetime.now().year, month)
+    except Exception:
+        return False
+
+
 async def get_post_url(post) -> str:
     try:
         link = await post.query_selector('a[data-id="main-feed-card__full-link"]')
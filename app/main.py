@@ -1,21 +1,82 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from app.linkedin_scraper import scrape_linkedin_posts
-from app.openai_analyzer import analyze_posts
-# from app.gemini_analyzer import analyze_posts
-from app.utils import parse_linkedin_url, parse_str_to_dict
-from app.googlesearch_async import search, scrape_news_content
-from typing import List, Optional
+from app.article_store import article_store
+from app.browser_pool import browser_pool
+from app.coalesce import SingleFlight, TaskMemo, flights
+from app.dedup import NearDuplicateIndex, dedup_stats
+from app.cache import analysis_cache
+from app.extraction_pool import extraction_pool
+from app.http_client import http_client
+from app.feed_store import feed_store
+from app.linkedin_scraper import check_time_in_month, scrape_linkedin_posts
+from app.models import PostData
+from app.openai_analyzer import analyze_posts, analyze_posts_packed, scheduler as llm_scheduler
+# from app.gemini_analyzer import analyze_posts, analyze_posts_packed, scheduler as llm_scheduler
+from app.packing import packing_stats
+from app.page_profile import scrape_totals
+from app.prefilter import preclassify, skip_stats
+from app.token_budget import budget_stats
+from app.utils import CATEGORY_PRIORITY, get_date_from_url, is_valid_analysis, parse_linkedin_url, parse_str_to_dict
+from app.googlesearch_async import FetchResult, SearchResult, download_stats, search, scrape_news_content
+from app.pipeline import Stage, run_pipeline
+from app.request_context import deadline_stats, request_id, start_deadline
+from app.serp_cache import serp_cache
+from app.jobs import Job, job_manager
+from app.streaming import event_stream_response, merge_streams, stream_response, until_deadline
+from typing import AsyncIterator, List, Optional
+import app.config as config
 import asyncio
+import uuid
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        # Only LinkedIn scraping needs a browser; it launches the pool on first use
+        print(f"Could not launch the browser pool, retrying on first use: {e}")
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    await browser_pool.stop()
+    await http_client.aclose()
+    extraction_pool.close()
+    analysis_cache.close()
+    article_store.close()
+    serp_cache.close()
+    feed_store.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Identical requests arriving together are answered from one run
+request_flight = SingleFlight("requests")
+
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    # LLM calls are queued fairly per incoming request, keyed by this id; it is
+    # returned as X-Request-ID so callers can find their token counts in /stats
+    rid = uuid.uuid4().hex
+    token = request_id.set(rid)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id.reset(token)
+    response.headers["X-Request-ID"] = rid
+    return response
 
 
 class LIRequest(BaseModel):
     linkedin_url: str
     month: int  # 1 - 12
     language: str # ch, en
+    pack_posts: bool = False  # analyze several short posts per LLM call
+    refresh: bool = False  # ignore stored posts and scrape the whole month again
 
 
 class GoogleNewsRequest(BaseModel):
@@ -24,6 +85,7 @@ class GoogleNewsRequest(BaseModel):
     month: Optional[int] = None
     language: str
     gs_language: Optional[str] = None
+    deadline: Optional[float] = None  # seconds to answer in, with partial results; defaults to REQUEST_DEADLINE
 
 
 class CombinedRequest(BaseModel):
@@ -33,6 +95,22 @@ class CombinedRequest(BaseModel):
     language: str  # ch, en
     num_google_results: int = 10
     gs_language: Optional[str] = None
+    pack_posts: bool = False
+    deadline: Optional[float] = None  # seconds to answer in, with partial results; defaults to REQUEST_DEADLINE
+
+
+class CompanyQuery(BaseModel):
+    linkedin_url: str = ""
+    google_query: str = ""
+
+
+class BulkDigestRequest(BaseModel):
+    companies: List[CompanyQuery]
+    month: int  # 1 - 12
+    language: str  # ch, en
+    num_google_results: int = 10
+    gs_language: Optional[str] = None
+    pack_posts: bool = False
 
 
 class ResponseModel(BaseModel):
@@ -44,54 +122,215 @@ class ResponseModel(BaseModel):
     category: str
     url: str
     img_links: List[str] | None = None
+    alternates: List[str] = []  # URLs of near-duplicate copies that were not analyzed again
+
+
+class CompanyDigest(BaseModel):
+    linkedin_url: str
+    google_query: str
+    results: List[ResponseModel]
+    error: Optional[str] = None
 
 
 
 async def post_process_results(results: list[ResponseModel]) -> list[ResponseModel]:
-    priority = {
-        'Fund-raised': 0,
-        'Business Collaboration': 1,
-        'Product-launched': 2,
-        'Awards': 3,
-        'Activities': 4,
-        'None': 5
-    }
-    results.sort(key=lambda d: priority[d.category])
+    results.sort(key=lambda d: CATEGORY_PRIORITY[d.category])
     return results
 
 
+@app.get("/stats")
+async def stats():
+    return {
+        "browser_pool": browser_pool.stats(),
+        "linkedin_scrapes": scrape_totals.stats(),
+        "http_client": http_client.stats(),
+        "analysis_cache": analysis_cache.stats(),
+        "article_store": article_store.stats(),
+        "serp_cache": serp_cache.stats(),
+        "article_downloads": download_stats,
+        "extraction_pool": extraction_pool.stats(),
+        "feed_store": feed_store.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "packing": packing_stats,
+        "dedup": dedup_stats,
+        "llm_skips": skip_stats,
+        "token_budget": budget_stats(),
+        "jobs": job_manager.stats(),
+        "deadlines": deadline_stats,
+        "single_flight": {flight.name: flight.stats() for flight in flights},
+    }
+
+
+def build_response(crawled_text: str, gpt_response: str, url: str, img_links: Optional[List[str]] = None) -> ResponseModel:
+    parsed = parse_str_to_dict(gpt_response)
+    return ResponseModel(
+        crawled_text=crawled_text,
+        headline=parsed.get("Headline", ""),
+        contents=parsed.get("Content", ""),
+        headline_zh_tw=parsed.get("Headline-zh-tw", ""),
+        contents_zh_tw=parsed.get("Content-zh-tw", ""),
+        category=parsed.get("Category", ""),
+        url=url,
+        img_links=img_links,
+    )
+
+
+def new_dedup_index() -> Optional[NearDuplicateIndex]:
+    return NearDuplicateIndex() if config.DEDUP_ENABLED else None
+
+
+def with_alternates(response: ResponseModel, cluster) -> ResponseModel:
+    # Shares the cluster's list, so duplicates found later still show up in the response
+    if cluster is not None:
+        response.alternates = cluster.alternates
+    return response
+
+
+async def stream_linkedin(req: LIRequest, scrape=None, analyze_text=None, dedup=None) -> AsyncIterator[ResponseModel]:
+    """
+    Yield analyzed LinkedIn posts in completion order.
+
+    `scrape` and `analyze_text` default to scrape_linkedin_posts and analyze_posts;
+    /bulk-digest passes shared versions of them. `dedup` is the request's
+    NearDuplicateIndex, shared with the news stream in /combined-search.
+    """
+    scrape = scrape or scrape_linkedin_posts
+    analyze_text = analyze_text or analyze_posts
+    dedup = dedup or new_dedup_index()
+
+    # Step 0: parse linkedin URL
+    linkedin_url = parse_linkedin_url(req.linkedin_url)
+    known = {} if req.refresh else await feed_store.load(linkedin_url)
+
+    # Step 1: Scrape LinkedIn posts we have not seen before
+    post_data_list = await scrape(req.linkedin_url, req.month, known_ids=set(known))
+    await feed_store.add_posts(linkedin_url, post_data_list)
+
+    # Step 1.5: merge back stored posts of this month, reusing their analysis when we have one
+    pending = list(post_data_list)
+    for record in known.values():
+        if not check_time_in_month(get_date_from_url(record["url"]), req.month):
+            continue
+        feed_store.reused_posts += 1
+        post = PostData(url=record["url"], text=record["text"], img_links=record["img_links"])
+        gpt_response = record["analyses"].get(req.language)
+        # Replies stored before they were validated may be unusable; analyze those again
+        if gpt_response and is_valid_analysis(gpt_response):
+            cluster = await dedup.add(post.url, post.text) if dedup else None
+            if dedup and cluster is None:
+                continue
+            feed_store.reused_analyses += 1
+            yield with_alternates(build_response(post.text, gpt_response, post.url, post.img_links), cluster)
+        else:
+            pending.append(post)
+
+    # Step 1.6: only one post per cluster of near-duplicates is analyzed
+    clusters = {}
+    if dedup:
+        for post in list(pending):
+            cluster = await dedup.add(post.url, post.text)
+            if cluster is None:
+                pending.remove(post)
+            else:
+                clusters[post.url] = cluster
+
+    # Step 2: Analyze with OpenAI
+    if req.pack_posts:
+        gpt_responses = await analyze_posts_packed([post.text for post in pending], req.language)
+        for post, gpt_response in zip(pending, gpt_responses):
+            await feed_store.save_analysis(linkedin_url, post, req.language, gpt_response)
+            yield with_alternates(build_response(post.text, gpt_response, post.url, post.img_links), clusters.get(post.url))
+        return
+
+    async def analyze(post: PostData) -> ResponseModel:
+        gpt_response = await analyze_text(post.text, req.language)
+        await feed_store.save_analysis(linkedin_url, post, req.language, gpt_response)
+        return with_alternates(build_response(post.text, gpt_response, post.url, post.img_links), clusters.get(post.url))
+
+    async for item in run_pipeline(pending, [
+        Stage("analyze", analyze, config.PIPELINE_ANALYZE_WORKERS),
+    ]):
+        yield item
+
+
+async def stream_news(req: GoogleNewsRequest, fetch_text=None, analyze_text=None, dedup=None) -> AsyncIterator[ResponseModel]:
+    """Yield analyzed news articles in completion order, one per cluster of near-duplicates."""
+    fetch_text = fetch_text or scrape_news_content
+    analyze_text = analyze_text or analyze_posts
+    dedup = dedup or new_dedup_index()
+
+    # step 1: google search
+    results = search(
+        term=req.query,
+        num_results=req.num_results,
+        month=req.month,
+        lang=req.gs_language,
+        advanced=True
+    )
+
+    # step 2: get news contents; articles that could not be fetched stop here
+    async def fetch(result: SearchResult) -> Optional[tuple[str, str]]:
+        fetched: FetchResult = await fetch_text(result.url)
+        if not fetched.ok:
+            skip_stats["fetch_failures"] += 1
+            print(f"Not analyzing {result.url}: {fetched.error}")
+            return None
+        return result.url, fetched.text
+
+    # step 2.5: syndicated copies of an article join the first one's cluster and stop here
+    async def deduplicate(fetched: tuple[str, str]):
+        url, crawled_text = fetched
+        cluster = await dedup.add(url, crawled_text) if dedup else None
+        if dedup and cluster is None:
+            return None
+        return url, crawled_text, cluster
+
+    # step 3: Analyze with OpenAI, unless the text clearly has nothing to categorize
+    async def analyze(fetched) -> ResponseModel:
+        url, crawled_text, cluster = fetched
+        gpt_response = preclassify(crawled_text) or await analyze_text(crawled_text, req.language)
+        return with_alternates(build_response(crawled_text, gpt_response, url), cluster)
+
+    # Results for a busy or throttled outlet are set aside while the fetch
+    # workers move on to other hosts, so one slow outlet doesn't block the rest
+    async for item in run_pipeline(results, [
+        Stage("fetch", fetch, config.PIPELINE_FETCH_WORKERS, ready_in=lambda result: http_client.host_ready_in(result.url)),
+        Stage("dedup", deduplicate, 1),
+        Stage("analyze", analyze, config.PIPELINE_ANALYZE_WORKERS),
+    ]):
+        yield item
+
+
+def stream_combined(req: CombinedRequest, scrape=None, fetch_text=None, analyze_text=None) -> AsyncIterator[ResponseModel]:
+    print(req)
+    # One index for both sources, so a post and the article covering it are analyzed once
+    dedup = new_dedup_index()
+    streams = []
+    if req.linkedin_url:
+        streams.append(stream_linkedin(LIRequest(linkedin_url=req.linkedin_url, month=req.month, language=req.language, pack_posts=req.pack_posts), scrape, analyze_text, dedup))
+
+    if req.google_query:
+        streams.append(stream_news(GoogleNewsRequest(query=req.google_query, num_results=req.num_google_results, month=req.month, language=req.language, gs_language=req.gs_language), fetch_text, analyze_text, dedup))
+
+    return merge_streams(*streams)
+
+
+async def collect(stream: AsyncIterator[ResponseModel]) -> list[ResponseModel]:
+    results = [item async for item in stream]
+    return await post_process_results(results)
+
+
+async def collect_by_deadline(stream: AsyncIterator[ResponseModel], seconds: Optional[float]) -> list[ResponseModel]:
+    # Started inside request_flight, which runs without the caller's deadline
+    start_deadline(config.REQUEST_DEADLINE if seconds is None else seconds)
+    return await collect(until_deadline(stream))
+
+
 @app.post("/scrape", response_model=List[ResponseModel])
 async def linkedin_request(req: LIRequest):
     try:
-        # Step 0: parse linkedin URL
-        linkedin_url = parse_linkedin_url(req.linkedin_url)
-
-        # Step 1: Scrape LinkedIn posts
-        post_data_list = await scrape_linkedin_posts(req.linkedin_url, req.month)
-
-        # Step 2: Analyze with OpenAI
-        tasks = []
-        for post in post_data_list:
-            tasks.append(analyze_posts(post.text, req.language))
-        
-        gpt_responses = await asyncio.gather(*tasks)
-        
-        results = []
-        for post, gpt_response in zip(post_data_list, gpt_responses):
-            parsed = parse_str_to_dict(gpt_response)
-            results.append(ResponseModel(
-                crawled_text=post.text,
-                headline=parsed.get("Headline", ""),
-                contents=parsed.get("Content", ""),
-                headline_zh_tw=parsed.get("Headline-zh-tw", ""),
-                contents_zh_tw=parsed.get("Content-zh-tw", ""),
-                category=parsed.get("Category", ""),
-                url=post.url,
-                img_links=post.img_links,
-            ))
-        
-        results = await post_process_results(results)
-        return results
+        key = ("scrape", parse_linkedin_url(req.linkedin_url), req.month, req.language, req.pack_posts, req.refresh)
+        return await request_flight.do(key, lambda: collect(stream_linkedin(req)))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -99,46 +338,8 @@ async def linkedin_request(req: LIRequest):
 @app.post("/search-news", response_model=List[ResponseModel])
 async def google_search_news_request(req: GoogleNewsRequest):
     try:
-        # step 1: google search
-        search_result_list = []
-        tasks = []
-        async for result in search(
-            term=req.query,
-            num_results=req.num_results,
-            month=req.month,
-            lang=req.gs_language,
-            advanced=True
-        ):
-            # print('result', result)
-            # step 1.5: keep search results
-            search_result_list.append(result)
-
-            # step 2: get news contents
-            tasks.append(asyncio.create_task(scrape_news_content(result.url)))
-        news_content_list = await asyncio.gather(*tasks)
-
-        # step 3: Analyze with OpenAI
-        tasks = []
-        for text in news_content_list:
-            tasks.append(analyze_posts(text, req.language))
-        gpt_responses = await asyncio.gather(*tasks)
-        
-        results = []
-        for search_result, crawled_text, gpt_response in zip(search_result_list, news_content_list, gpt_responses):
-            parsed = parse_str_to_dict(gpt_response)
-            results.append(ResponseModel(
-                crawled_text=crawled_text,
-                headline=parsed.get("Headline", ""),
-                contents=parsed.get("Content", ""),
-                headline_zh_tw=parsed.get("Headline-zh-tw", ""),
-                contents_zh_tw=parsed.get("Content-zh-tw", ""),
-                category=parsed.get("Category", ""),
-                url=search_result.url,
-                # img_links=post.img_links,
-            ))
-
-        results = await post_process_results(results)
-        return results
+        key = ("search-news", req.query.strip().lower(), req.num_results, req.month, req.language, req.gs_language, req.deadline)
+        return await request_flight.do(key, lambda: collect_by_deadline(stream_news(req), req.deadline))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -146,26 +347,123 @@ async def google_search_news_request(req: GoogleNewsRequest):
 @app.post("/combined-search", response_model=List[ResponseModel])
 async def combined_search(req: CombinedRequest):
     try:
-        print(req)
-        # Run both scrapers concurrently
-        tasks = []
-        if req.linkedin_url:
-            tasks.append(linkedin_request(LIRequest(linkedin_url=req.linkedin_url, month=req.month, language=req.language)))
-
-        if req.google_query:
-            tasks.append(google_search_news_request(GoogleNewsRequest(query=req.google_query, num_results=req.num_google_results, month=req.month, language=req.language, gs_language=req.gs_language)))
-
-        # Wait for both tasks to complete
-        results = await asyncio.gather(*tasks)
-
-        # 解包結果
-        linkedin_results = results[0] if req.linkedin_url else []
-        google_results = results[1] if req.google_query and req.linkedin_url else results[0] if req.google_query else []
-        
-        # Combine and sort results
-        combined_results = linkedin_results + google_results
-        combined_results = await post_process_results(combined_results)
-        
-        return combined_results
+        key = (
+            "combined-search", parse_linkedin_url(req.linkedin_url) if req.linkedin_url else "",
+            req.google_query.strip().lower(), req.month, req.language,
+            req.num_google_results, req.gs_language, req.pack_posts, req.deadline,
+        )
+        return await request_flight.do(key, lambda: collect_by_deadline(stream_combined(req), req.deadline))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/bulk-digest", response_model=List[CompanyDigest])
+async def bulk_digest(req: BulkDigestRequest):
+    """
+    Monthly digest for many companies in one call. LinkedIn pages, article URLs
+    and identical texts shared between companies are scraped, fetched and
+    analyzed once; browsers, connections and LLM calls come from the shared pools.
+    """
+    return await run_bulk_digest(req)
+
+
+async def run_bulk_digest(req: BulkDigestRequest, job: Optional[Job] = None) -> list[CompanyDigest]:
+    memo = TaskMemo()
+
+    def scrape(url: str, month: int, known_ids: set[str]):
+        return memo.run(("linkedin", parse_linkedin_url(url), month), lambda: scrape_linkedin_posts(url, month, known_ids=known_ids))
+
+    def fetch_text(url: str):
+        return memo.run(("article", url), lambda: scrape_news_content(url))
+
+    def analyze_text(text: str, language: str):
+        return memo.run(("analysis", text, language), lambda: analyze_posts(text, language))
+
+    slots = asyncio.Semaphore(config.BULK_COMPANY_CONCURRENCY)
+
+    async def run_company(index: int, company: CompanyQuery) -> CompanyDigest:
+        combined = CombinedRequest(
+            linkedin_url=company.linkedin_url,
+            google_query=company.google_query,
+            month=req.month,
+            language=req.language,
+            num_google_results=req.num_google_results,
+            gs_language=req.gs_language,
+            pack_posts=req.pack_posts,
+        )
+        async with slots:
+            try:
+                results = await collect(stream_combined(combined, scrape, fetch_text, analyze_text))
+                digest = CompanyDigest(linkedin_url=company.linkedin_url, google_query=company.google_query, results=results)
+            except Exception as e:
+                # One failing company should not sink the whole digest
+                print(f"Bulk digest failed for {company}: {e}")
+                digest = CompanyDigest(linkedin_url=company.linkedin_url, google_query=company.google_query, results=[], error=str(e))
+        if job:
+            await job.emit("company", index=index, results=len(digest.results), error=digest.error)
+        return digest
+
+    digests = await asyncio.gather(*(run_company(index, company) for index, company in enumerate(req.companies)))
+    print(f"Bulk digest for {len(req.companies)} companies reused {memo.hits} shared results")
+    return digests
+
+
+async def run_combined_job(req: CombinedRequest, job: Job) -> list[ResponseModel]:
+    # Jobs exist for long runs, so they only get a deadline when the request names one
+    start_deadline(req.deadline)
+    items = []
+    async for item in until_deadline(stream_combined(req)):
+        await job.emit("item", index=len(items), item=item.model_dump())
+        items.append(item)
+    return await post_process_results(items)
+
+
+@app.post("/jobs/combined-search")
+async def submit_combined_search_job(req: CombinedRequest):
+    job, attached = job_manager.submit("combined-search", req.model_dump(), lambda job: run_combined_job(req, job))
+    return {**job.summary(), "attached": attached}
+
+
+@app.post("/jobs/bulk-digest")
+async def submit_bulk_digest_job(req: BulkDigestRequest):
+    job, attached = job_manager.submit("bulk-digest", req.model_dump(), lambda job: run_bulk_digest(req, job))
+    return {**job.summary(), "attached": attached}
+
+
+def get_job(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return get_job(job_id).summary()
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = get_job(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if not job.finished:
+        return JSONResponse(status_code=202, content=job.summary())
+    return job.result
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, format: str = "ndjson"):
+    return event_stream_response(get_job(job_id).stream_events(), format)
+
+
+@app.post("/search-news/stream")
+async def google_search_news_stream(req: GoogleNewsRequest, format: str = "ndjson"):
+    start_deadline(config.REQUEST_DEADLINE if req.deadline is None else req.deadline)
+    return stream_response(until_deadline(stream_news(req)), post_process_results, format)
+
+
+@app.post("/combined-search/stream")
+async def combined_search_stream(req: CombinedRequest, format: str = "ndjson"):
+    start_deadline(config.REQUEST_DEADLINE if req.deadline is None else req.deadline)
+    return stream_response(until_deadline(stream_combined(req)), post_process_results, format)
@@ -1,21 +1,66 @@
 from openai import AsyncOpenAI
+from app.cache import analysis_cache, make_key
+from app.coalesce import SingleFlight
+from app.packing import analyze_packed, format_articles
+from app.rate_limiter import LLMScheduler
+from app.token_budget import fit_input, token_counter
+from app.utils import is_valid_analysis
+import app.config as config
 import app.prompts as prompts
 import dotenv
 
 
 client = AsyncOpenAI(
     api_key=dotenv.dotenv_values(".env")["OPENAI_API_KEY"],
+    max_retries=0,  # retries go through the scheduler so they respect the shared budget
     )
 
+PROVIDER = "openai"
+MODEL = "gpt-4.1-nano"
+
+analysis_flight = SingleFlight("analysis")
+count_tokens = token_counter(PROVIDER, MODEL)
+scheduler = LLMScheduler(PROVIDER, rpm=config.OPENAI_RPM, tpm=config.OPENAI_TPM)
+
 
 # OpenAI API 請求封裝
 async def analyze_posts(post_text: str, language: str) -> str:
+    # Identical inputs analyzed concurrently share one LLM call
+    key = analysis_key(post_text, language)
+    return await analysis_flight.do(key, lambda: _analyze_posts(key, post_text, language))
+
+
+async def _analyze_posts(key: str, post_text: str, language: str) -> str:
+    cached = await analysis_cache.get(key)
+    # Entries cached before replies were validated may still hold a bad one
+    if cached is not None and is_valid_analysis(cached):
+        return cached
+
+    # Long inputs are cut (or summarized) to the token budget first
+    post_text = await fit_input(post_text, count_tokens, summarize)
     prompt = prepare_prompt(post_text, language)
     # print(prompt)
     response = await call_openai_api(prompt)
+    # Unparseable or uncategorized replies are not cached so the next request gets another try
+    if is_valid_analysis(response):
+        await analysis_cache.set(key, response)
     return response
 
 
+# 多篇短貼文合併成一次請求
+async def analyze_posts_packed(post_texts: list[str], language: str) -> list[str]:
+    return await analyze_packed(post_texts, language, analyze_posts, call_openai_api, prepare_packed_prompt, analysis_key)
+
+
+async def summarize(text: str) -> str:
+    prompt = prompts.SummaryPrompt.format(text=text, words=config.LLM_SUMMARY_TOKENS // 2)
+    return await call_openai_api(prompt, config.LLM_SUMMARY_TOKENS, prompts.SummaryInstruction)
+
+
+def analysis_key(post_text: str, language: str) -> str:
+    return make_key(PROVIDER, MODEL, language, prompts.PROMPT_VERSION, prompts.LIInstruction, post_text)
+
+
 # 準備 ChatGPT 請求的提示（Prompt）
 def prepare_prompt(post_text: str, language: str) -> str:
     if language == "ch":
@@ -26,11 +71,26 @@ def prepare_prompt(post_text: str, language: str) -> str:
         raise ValueError(f"Unsupported language: {language}")
 
 
+def prepare_packed_prompt(post_texts: list[str], language: str) -> str:
+    articles = format_articles(post_texts)
+    if language == "ch":
+        return prompts.LIPackedPromptCHEN.format(articles=articles, count=len(post_texts))
+    elif language == "en":
+        return prompts.LIPackedPromptEN.format(articles=articles, count=len(post_texts))
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+
+
 # 呼叫 OpenAI API
-async def call_openai_api(prompt: str) -> str:
-    response = await client.responses.create(
-        model="gpt-4.1-nano",
-        instructions=prompts.LIInstruction,
+async def call_openai_api(
+    prompt: str,
+    output_tokens: int = config.LLM_OUTPUT_TOKENS,
+    instructions: str = prompts.LIInstruction,
+) -> str:
+    tokens = count_tokens(instructions) + count_tokens(prompt) + output_tokens
+    response = await scheduler.run(lambda: client.responses.create(
+        model=MODEL,
+        instructions=instructions,
         input=prompt,
         # prompt=prompt,
         # max_tokens=1000,
@@ -38,7 +98,7 @@ async def call_openai_api(prompt: str) -> str:
         # top_p=1,
         # frequency_penalty=0,
         # presence_penalty=0,
-    )
+    ), tokens)
     # response = response.choices[0].text.strip()
     # print(type(response.output_text))
     return response.output_text
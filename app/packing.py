@@ -0,0 +1,118 @@
+from typing import Awaitable, Callable, Optional
+from app.cache import analysis_cache
+from app.utils import estimate_tokens, is_valid_analysis
+import app.config as config
+import asyncio
+import json
+
+
+packing_stats = {
+    "packed_calls": 0,
+    "packed_items": 0,
+    "fallbacks": 0,
+}
+
+
+def format_articles(texts: list[str]) -> str:
+    return "\n\n".join(f'[{index}]\n"""\n{text}\n"""' for index, text in enumerate(texts))
+
+
+def make_packs(
+    texts: list[str],
+    max_items: int = config.PACK_MAX_ITEMS,
+    max_tokens: int = config.PACK_MAX_TOKENS,
+) -> list[list[int]]:
+    """Group text indices greedily so each group stays within the item and token limits."""
+    packs = []
+    current, current_tokens = [], 0
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def split_packed_response(response: str, count: int) -> list[Optional[str]]:
+    """
+    Split an indexed JSON-array reply into one JSON object string per item, in
+    the same shape parse_str_to_dict expects from a single-item call. Items that
+    are missing or malformed come back as None.
+    """
+    items: list[Optional[str]] = [None] * count
+    try:
+        parsed = json.loads(response.replace('```json', '').replace('```', '').strip())
+    except (json.JSONDecodeError, AttributeError):
+        return items
+    if not isinstance(parsed, list):
+        return items
+
+    for entry in parsed:
+        if not isinstance(entry, dict) or "Category" not in entry:
+            continue
+        index = entry.pop("Index", None)
+        if isinstance(index, str) and index.isdigit():
+            index = int(index)
+        if isinstance(index, int) and 0 <= index < count and items[index] is None:
+            items[index] = json.dumps(entry, ensure_ascii=False)
+    return items
+
+
+async def analyze_packed(
+    texts: list[str],
+    language: str,
+    analyze_one: Callable[[str, str], Awaitable[str]],
+    call: Callable[..., Awaitable[str]],
+    prepare_packed_prompt: Callable[[list[str], str], str],
+    key: Callable[[str, str], str],
+) -> list[str]:
+    """
+    Analyze `texts`, packing short uncached ones into shared LLM calls.
+
+    Long texts, single leftovers and anything the packed reply got wrong go
+    through `analyze_one` (the analyzer's analyze_posts) as usual.
+    """
+    results: list[Optional[str]] = [None] * len(texts)
+    short, single = [], []
+    for index, text in enumerate(texts):
+        cached = await analysis_cache.get(key(text, language))
+        if cached is not None and is_valid_analysis(cached):
+            results[index] = cached
+        elif estimate_tokens(text) <= config.PACK_MAX_ITEM_TOKENS:
+            short.append(index)
+        else:
+            single.append(index)
+
+    async def run_single(index: int):
+        results[index] = await analyze_one(texts[index], language)
+
+    async def run_pack(indices: list[int]):
+        if len(indices) == 1:
+            return await run_single(indices[0])
+
+        prompt = prepare_packed_prompt([texts[i] for i in indices], language)
+        response = await call(prompt, output_tokens=config.LLM_OUTPUT_TOKENS * len(indices))
+        packing_stats["packed_calls"] += 1
+
+        retry = []
+        for index, item in zip(indices, split_packed_response(response, len(indices))):
+            if item is None or not is_valid_analysis(item):
+                retry.append(index)
+                continue
+            packing_stats["packed_items"] += 1
+            results[index] = item
+            await analysis_cache.set(key(texts[index], language), item)
+
+        packing_stats["fallbacks"] += len(retry)
+        await asyncio.gather(*(run_single(index) for index in retry))
+
+    packs = [[short[i] for i in pack] for pack in make_packs([texts[i] for i in short])]
+    await asyncio.gather(
+        *(run_pack(pack) for pack in packs),
+        *(run_single(index) for index in single),
+    )
+    return results
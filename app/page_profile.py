@@ -0,0 +1,167 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from playwright.async_api import BrowserContext, Response, Route
+from urllib.parse import urlparse
+
+
+@dataclass(frozen=True)
+class PageProfile:
+    """Which requests a scraping page may make. We only read text, post links and image src attributes."""
+    name: str
+    block_resource_types: frozenset = frozenset()
+    block_third_party: bool = False
+    first_party_domains: tuple = ("linkedin.com", "licdn.com")
+    block_url_keywords: tuple = ()
+
+    def block_reason(self, url: str, resource_type: str) -> str | None:
+        if resource_type in self.block_resource_types:
+            return resource_type
+        host = urlparse(url).hostname or ""
+        if self.block_third_party and not any(host == d or host.endswith("." + d) for d in self.first_party_domains):
+            return "third-party"
+        lowered = url.lower()
+        if any(keyword in lowered for keyword in self.block_url_keywords):
+            return "tracking"
+        return None
+
+
+TRACKING_KEYWORDS = (
+    "/li/track", "/collect", "analytics", "doubleclick", "googletagmanager",
+    "google-analytics", "px.ads", "beacon", "/tscp-serving/", "sentry",
+)
+
+PROFILES = {
+    "off": PageProfile("off"),
+    # Skip heavy assets and trackers; images are not downloaded but <img src> stays in the DOM
+    "light": PageProfile(
+        "light",
+        block_resource_types=frozenset({"image", "media", "font"}),
+        block_third_party=True,
+        block_url_keywords=TRACKING_KEYWORDS,
+    ),
+    # Also drop stylesheets; faster, but innerText then includes text CSS would have hidden
+    "minimal": PageProfile(
+        "minimal",
+        block_resource_types=frozenset({"image", "media", "font", "stylesheet", "texttrack", "eventsource", "manifest", "other"}),
+        block_third_party=True,
+        block_url_keywords=TRACKING_KEYWORDS,
+    ),
+}
+
+
+# Rough transfer sizes of one request per resource type, used to estimate what an
+# aborted request would have cost until enough unblocked responses of that type were seen
+TYPICAL_BYTES = {
+    "document": 30_000,
+    "stylesheet": 20_000,
+    "script": 30_000,
+    "image": 25_000,
+    "media": 250_000,
+    "font": 30_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+DEFAULT_TYPICAL_BYTES = 5_000
+MIN_OBSERVED = 20  # responses of a type before their average replaces the typical size
+
+
+class ResponseSizes:
+    """Average Content-Length of loaded responses per resource type, over all scrapes."""
+
+    def __init__(self):
+        self.bytes: Counter = Counter()
+        self.count: Counter = Counter()
+
+    def observe(self, resource_type: str, length: int):
+        self.bytes[resource_type] += length
+        self.count[resource_type] += 1
+
+    def estimate(self, resource_type: str) -> int:
+        if self.count[resource_type] >= MIN_OBSERVED:
+            return self.bytes[resource_type] // self.count[resource_type]
+        return TYPICAL_BYTES.get(resource_type, DEFAULT_TYPICAL_BYTES)
+
+
+response_sizes = ResponseSizes()
+
+
+@dataclass
+class ResourceBlocker:
+    """
+    Route handler applying a PageProfile to a browser context, counting what it
+    saved. Aborted requests have no size, so `est_bytes_saved` adds up the
+    estimate of response_sizes for each one's resource type.
+    """
+    profile: PageProfile
+    blocked: Counter = field(default_factory=Counter)
+    allowed: int = 0
+    bytes_loaded: int = 0
+    est_bytes_saved: int = 0
+
+    async def attach(self, context: BrowserContext):
+        if self.profile.name != "off":
+            await context.route("**/*", self._handle)
+        context.on("response", self._on_response)
+
+    async def _handle(self, route: Route):
+        request = route.request
+        reason = self.profile.block_reason(request.url, request.resource_type)
+        if reason:
+            self.blocked[reason] += 1
+            self.est_bytes_saved += response_sizes.estimate(request.resource_type)
+            await route.abort()
+        else:
+            self.allowed += 1
+            await route.continue_()
+
+    def _on_response(self, response: Response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.bytes_loaded += int(length)
+            response_sizes.observe(response.request.resource_type, int(length))
+
+    def stats(self) -> dict:
+        return {
+            "profile": self.profile.name,
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_reason": dict(self.blocked),
+            "allowed_requests": self.allowed,
+            "bytes_loaded": self.bytes_loaded,
+            "est_bytes_saved": self.est_bytes_saved,
+        }
+
+
+class ScrapeTotals:
+    """Running totals over all LinkedIn scrapes, per profile, for GET /stats."""
+
+    def __init__(self):
+        self.totals: dict[str, Counter] = {}
+
+    def add(self, blocker: ResourceBlocker):
+        totals = self.totals.setdefault(blocker.profile.name, Counter())
+        totals["scrapes"] += 1
+        totals["blocked_requests"] += sum(blocker.blocked.values())
+        totals["allowed_requests"] += blocker.allowed
+        totals["bytes_loaded"] += blocker.bytes_loaded
+        totals["est_bytes_saved"] += blocker.est_bytes_saved
+
+    def stats(self) -> dict:
+        stats = {
+            name: {
+                **totals,
+                "avg_bytes_loaded": totals["bytes_loaded"] // totals["scrapes"],
+                "avg_est_bytes_saved": totals["est_bytes_saved"] // totals["scrapes"],
+                "avg_blocked_requests": round(totals["blocked_requests"] / totals["scrapes"], 1),
+            }
+            for name, totals in self.totals.items()
+        }
+        # Once there are unblocked ("off") scrapes to compare with, also report the measured saving
+        if "off" in stats:
+            baseline = stats["off"]["avg_bytes_loaded"]
+            for name, profile_stats in stats.items():
+                if name != "off":
+                    profile_stats["avg_bytes_saved"] = baseline - profile_stats["avg_bytes_loaded"]
+        return stats
+
+
+scrape_totals = ScrapeTotals()
@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Optional
+from app.request_context import DeadlineExceeded, deadline_stats
+import app.config as config
+import asyncio
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline: `workers` tasks pull items from a queue of
+    `queue_size` and push `fn(item)` to the next stage. Returning None (or
+    raising DeadlineExceeded) drops the item.
+
+    `ready_in(item)`, when given, is how many seconds the item would wait
+    before `fn` could start on it (a busy or throttled host, say). Such items
+    are set aside, up to `queue_size` per worker, and the worker moves on to
+    later ones until they are ready.
+    """
+    name: str
+    fn: Callable[[Any], Awaitable[Optional[Any]]]
+    workers: int
+    queue_size: int = config.PIPELINE_QUEUE_SIZE
+    ready_in: Optional[Callable[[Any], float]] = None
+
+
+class _Stop:
+    pass
+
+
+class _Failure:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+_STOP = _Stop()
+
+
+async def _iterate(source: AsyncIterable | Iterable) -> AsyncIterator:
+    if hasattr(source, "__aiter__"):
+        async for item in source:
+            yield item
+    else:
+        for item in source:
+            yield item
+
+
+async def run_pipeline(source: AsyncIterable | Iterable, stages: list[Stage]) -> AsyncIterator:
+    """
+    Push every item of `source` through `stages` and yield results in completion order.
+
+    Each stage has its own bounded input queue, so a slow stage backs pressure up
+    to the source instead of piling up tasks, and an item enters the next stage
+    as soon as the previous one is done with it.
+    """
+    queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in stages]
+    output: asyncio.Queue = asyncio.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+    finished = [0] * len(stages)
+
+    async def feed():
+        try:
+            async for item in _iterate(source):
+                await queues[0].put(item)
+        except Exception as e:
+            await output.put(_Failure(e))
+        for _ in range(stages[0].workers):
+            await queues[0].put(_STOP)
+
+    async def items(index: int, stage: Stage) -> AsyncIterator:
+        """The items of a stage's queue, ones that would wait (see Stage.ready_in) once they are ready."""
+        if not stage.ready_in:
+            while (item := await queues[index].get()) is not _STOP:
+                yield item
+            return
+
+        deferred, stopped = [], False
+        while deferred or not stopped:
+            timeout = None
+            if deferred:
+                waits = [stage.ready_in(item) for item in deferred]
+                soonest = min(range(len(deferred)), key=waits.__getitem__)
+                if waits[soonest] <= 0 or stopped:
+                    # Once the input is exhausted there is nothing better to do than wait for it
+                    yield deferred.pop(soonest)
+                    continue
+                timeout = waits[soonest]
+
+            try:
+                item = await asyncio.wait_for(queues[index].get(), timeout)
+            except asyncio.TimeoutError:
+                continue
+            if item is _STOP:
+                stopped = True
+            elif len(deferred) < stage.queue_size and stage.ready_in(item) > 0:
+                deferred.append(item)
+            else:
+                yield item
+
+    async def work(index: int, stage: Stage):
+        next_queue = queues[index + 1] if index + 1 < len(stages) else output
+        try:
+            async for item in items(index, stage):
+                try:
+                    result = await stage.fn(item)
+                except DeadlineExceeded:
+                    # Out of time for this item; the others may still make it
+                    deadline_stats["dropped_items"] += 1
+                    result = None
+                if result is not None:
+                    await next_queue.put(result)
+        except Exception as e:
+            await output.put(_Failure(e))
+        finally:
+            finished[index] += 1
+
+        # The last worker out tells the next stage that no more input is coming
+        if finished[index] == stage.workers:
+            downstream = stages[index + 1].workers if index + 1 < len(stages) else 1
+            for _ in range(downstream):
+                await next_queue.put(_STOP)
+
+    tasks = [asyncio.create_task(feed())]
+    for index, stage in enumerate(stages):
+        tasks += [asyncio.create_task(work(index, stage)) for _ in range(stage.workers)]
+
+    try:
+        while True:
+            item = await output.get()
+            if item is _STOP:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
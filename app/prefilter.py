@@ -0,0 +1,62 @@
+"""
+Cheap local checks that decide when an LLM call is not worth making.
+
+An article with no word of funding, partnerships, launches, awards or
+company milestones cannot be given any category but "None", so it gets
+that answer directly. The vocabulary is deliberately broad: a false
+"has signal" only costs the LLM call we would have made anyway.
+"""
+from typing import Optional
+import app.config as config
+import json
+import re
+
+
+SIGNAL_WORDS = re.compile(
+    # Whole words only, so "around", "background" or "fundamental" are not signals
+    r"\b(?:"
+    # Fund-raised
+    r"fund(?:s|ed|ing|raising)?|rais(?:e|es|ed|ing)|invest(?:s|ed|ing|ment|ments|or|ors)?|rounds?|seed|"
+    r"series [a-e]|valuations?|acquir(?:e|es|ed|ing)|acquisitions?|mergers?|ipos?|"
+    # Business Collaboration
+    r"partner(?:s|ed|ing|ship|ships)?|collaborat(?:e|es|ed|ing|ion|ions)|alliances?|agreements?|"
+    r"contracts?|joint ventures?|mou|teams? up|"
+    # Product-launched
+    r"launch(?:es|ed|ing)?|releas(?:e|es|ed|ing)|unveil(?:s|ed|ing)?|introduc(?:es|ed|ing) (?:a |an |its |the )?new|"
+    r"debut(?:s|ed)?|roll(?:s|ed|ing)? out|new products?|"
+    # Awards
+    r"award(?:s|ed)?|prizes?|winners?|won|wins?|honou?r(?:s|ed)?|recogni(?:sed|zed|tion)|ranked|finalists?|"
+    # Activities
+    r"milestones?|expan(?:d|ds|ded|ding|sion)|conferences?|summits?|expos?|exhibit(?:s|ed|ion|ions)?|"
+    r"showcas(?:e|es|ed|ing)|demo days?|accelerators?"
+    r")\b|"
+    r"融資|募資|投資|估值|併購|收購|上市|合作|夥伴|聯盟|簽署|簽約|合約|發表|推出|發布|上線|"
+    r"獲獎|得獎|榮獲|殊榮|冠軍|入選|里程碑|擴展|展覽|展會|論壇|峰會|加速器",
+    re.IGNORECASE,
+)
+
+# What the analyzers would return for content without a category
+NO_SIGNAL_RESPONSE = json.dumps({
+    "Headline": "",
+    "Content": "",
+    "Headline-zh-tw": "",
+    "Content-zh-tw": "",
+    "Category": "None",
+})
+
+skip_stats = {
+    "fetch_failures": 0,
+    "no_signal": 0,
+}
+
+
+def has_signal(text: str) -> bool:
+    return SIGNAL_WORDS.search(text) is not None
+
+
+def preclassify(text: str) -> Optional[str]:
+    """The canned "None" analysis when `text` clearly has no signal, otherwise None (ask the LLM)."""
+    if not config.PREFILTER_ENABLED or has_signal(text):
+        return None
+    skip_stats["no_signal"] += 1
+    return NO_SIGNAL_RESPONSE
@@ -1,3 +1,6 @@
+# Bump whenever a prompt below changes so cached LLM analyses are not reused
+PROMPT_VERSION = "1"
+
 LIInstruction = (
     "You are a professional content analyst creating strategic summaries for startup accelerators and venture capital firms. "
     "Your role is to extract and communicate key developments from startup updates, focusing only on strategically significant news "
@@ -148,3 +151,78 @@ Return the output strictly in the following JSON format:
 }}'''
 
 
+
+
+
+# Several short posts in one request; {articles} is built by app.packing.format_articles
+LIPackedPromptEN = '''{articles}
+
+Above are {count} separate pieces of content, each preceded by its index in square brackets.
+Treat every piece independently and, for EACH one, perform the following tasks:
+1. Headline: Write a compelling LinkedIn post title in the third person.
+2. Content: Write a LinkedIn post in the third person, limited to 130 words, using a professional and engaging tone.
+3. Category Classification: Only assign a category if the content is genuinely newsworthy. Otherwise, assign "None".
+Valid categories:
+  - Fund-raised: Mentions of investment or funding rounds.
+  - Business Collaboration: Major partnerships or collaborations.
+  - Product-launched: Significant new product or feature releases.
+  - Awards: Recognition from reputable organizations or competitions.
+  - Activities: Major company events or milestone initiatives that reflect growth or traction.
+  - None: If the content is not newsworthy or lacks public impact.
+
+Return the output strictly as a JSON array with exactly one object per piece of content, in the following format:
+[
+  {{
+    "Index": {{Index}},
+    "Headline": "{{Headline}}",
+    "Content": "{{Content}}",
+    "Category": "{{Category}}"
+  }}
+]'''
+
+
+
+LIPackedPromptCHEN = '''{articles}
+
+Above are {count} separate pieces of content, each preceded by its index in square brackets.
+You are a professional social media strategist working for a startup accelerator. Treat every piece independently and, for EACH one, perform the following tasks:
+
+1. **English Headline**: Write a compelling LinkedIn post title in the third person.
+2. **English Content**: Write a LinkedIn post in the third person, limited to 130 words, using a professional and engaging tone.
+3. **繁體中文標題**：以第三人稱撰寫一則 LinkedIn 社群貼文標題。
+4. **繁體中文內容**：以第三人稱撰寫一則 LinkedIn 社群貼文內容，語氣專業且具吸引力。
+5. **Category Classification**: Only classify the announcement into one of the following categories **if it is strategically important for an accelerator to promote**. Otherwise, assign "None".
+
+   Valid categories:
+   - Fund-raised: Mentions of investment or funding rounds.
+   - Business Collaboration: Major partnerships or collaborations.
+   - Product-launched: Significant new product or feature releases.
+   - Awards: Recognition from reputable organizations or competitions.
+   - Activities: Major company events or milestone initiatives that reflect growth or traction.
+   - None: For routine updates, internal stories, or content not strategically relevant.
+
+Return the output strictly as a JSON array with exactly one object per piece of content, in the following format:
+[
+  {{
+    "Index": {{Index}},
+    "Headline": "{{Headline}}",
+    "Content": "{{Content}}",
+    "Headline-zh-tw": "{{Headline-zh-tw}}",
+    "Content-zh-tw": "{{Content-zh-tw}}",
+    "Category": "{{Category}}"
+  }}
+]'''
+
+
+
+SummaryInstruction = (
+    "You condense long news articles and company posts without changing their meaning. "
+    "Keep every concrete fact: names, amounts, dates, partners, products, awards and figures. "
+    "Write in the same language as the source text and do not add commentary."
+)
+
+SummaryPrompt = '''"""
+{text}
+"""
+
+Summarize the above excerpt in at most {words} words, keeping the key facts.'''
@@ -0,0 +1,259 @@
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+from app.request_context import DeadlineExceeded, request_id, time_left
+import app.config as config
+import asyncio
+import httpx
+import random
+import time
+
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _network_errors() -> tuple[type[Exception], ...]:
+    # google-genai lets httpx's errors through; openai wraps them in APIConnectionError (and APITimeoutError)
+    errors: list[type[Exception]] = [httpx.TransportError, ConnectionError, TimeoutError]
+    try:
+        import openai
+        errors.append(openai.APIConnectionError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+# Failures to reach the provider at all, which have no HTTP status but are worth retrying
+NETWORK_ERRORS = _network_errors()
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """HTTP status of a provider SDK error (openai uses `status_code`, google-genai uses `code`)."""
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    return isinstance(error, NETWORK_ERRORS) or error_status(error) in RETRYABLE_STATUS
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    return parse_retry_after(headers.get("retry-after") if headers else None)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given as seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    """
+    Process-wide gate in front of one LLM provider.
+
+    Calls wait for both a requests-per-minute and a tokens-per-minute bucket,
+    are granted round-robin across HTTP requests (see app.request_context) so
+    one large digest cannot starve the others, and are retried on 429/5xx and
+    connection errors or timeouts with jittered exponential backoff. A Retry-After from the provider pauses the
+    whole scheduler, not just the call that received it.
+
+    With `hedge` on, a call still running after the p95 of recent call
+    latencies gets a backup copy and the first success wins. Retries that
+    would end after the request deadline are not attempted.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rpm: int,
+        tpm: int,
+        max_retries: int = config.LLM_MAX_RETRIES,
+        backoff_base: float = config.LLM_BACKOFF_BASE,
+        backoff_max: float = config.LLM_BACKOFF_MAX,
+        hedge: bool = config.LLM_HEDGE,
+    ):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+
+        self._request_budget = float(rpm)
+        self._token_budget = float(tpm)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+
+        self._queues: dict[str, deque] = {}
+        self._order: deque[str] = deque()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._latencies: deque[float] = deque(maxlen=200)
+
+        self.granted = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failed = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._request_budget = min(self.rpm, self._request_budget + elapsed * self.rpm / 60)
+        self._token_budget = min(self.tpm, self._token_budget + elapsed * self.tpm / 60)
+
+    def _budget_wait(self, tokens: int) -> float:
+        """Seconds until a call of `tokens` fits in both buckets."""
+        self._refill()
+        wait = self._paused_until - time.monotonic()
+        if self._request_budget < 1:
+            wait = max(wait, (1 - self._request_budget) * 60 / self.rpm)
+        if self._token_budget < tokens:
+            wait = max(wait, (tokens - self._token_budget) * 60 / self.tpm)
+        return wait
+
+    async def _dispatch(self):
+        while self._order:
+            key = self._order.popleft()
+            queue = self._queues[key]
+            waiter, tokens = queue.popleft()
+            if queue:
+                self._order.append(key)
+            else:
+                del self._queues[key]
+            if waiter.done():
+                continue
+
+            while (wait := self._budget_wait(tokens)) > 0:
+                await asyncio.sleep(wait)
+            if waiter.done():
+                continue
+            self._request_budget -= 1
+            self._token_budget -= tokens
+            self.granted += 1
+            waiter.set_result(None)
+        self._dispatcher = None
+
+    async def acquire(self, tokens: int):
+        """Wait for this request's turn and for budget to send a call of `tokens` tokens."""
+        tokens = min(tokens, self.tpm)
+        key = request_id.get()
+        waiter = asyncio.get_running_loop().create_future()
+        if key not in self._queues:
+            self._queues[key] = deque()
+            self._order.append(key)
+        self._queues[key].append((waiter, tokens))
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await waiter
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps retries from many requests from landing in the same instant
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def run(self, call: Callable[[], Awaitable[T]], tokens: int) -> T:
+        """Send `call()` once there is budget for it, retrying 429/5xx responses and network errors."""
+        for attempt in range(self.max_retries + 1):
+            left = time_left()
+            if left is not None and left <= 0:
+                raise DeadlineExceeded(f"{self.name} call not started before the request deadline")
+            await self.acquire(tokens)
+            try:
+                return await self._send_hedged(call, tokens)
+            except Exception as e:
+                status = error_status(e)
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self.failed += 1
+                    raise
+
+                delay = retry_after(e)
+                if status == 429:
+                    self.throttled += 1
+                    if delay is not None:
+                        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                left = time_left()
+                if left is not None and delay >= left:
+                    self.failed += 1
+                    raise DeadlineExceeded(f"{self.name} returned {status or type(e).__name__} and there is no time left to retry") from e
+                self.retries += 1
+                print(f"{self.name} returned {status or type(e).__name__}, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                await asyncio.sleep(delay)
+
+    async def _send(self, call: Callable[[], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        try:
+            return await call()
+        finally:
+            # Cancelled (hedged-out) calls count too, or the p95 would drift down
+            self._latencies.append(time.monotonic() - started)
+
+    async def _send_backup(self, call: Callable[[], Awaitable[T]], tokens: int) -> T:
+        await self.acquire(tokens)
+        return await self._send(call)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a call gets a backup copy, or None while hedging is off or unwarmed."""
+        if not self.hedge or len(self._latencies) < config.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        latencies = sorted(self._latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return max(config.LLM_HEDGE_MIN_DELAY, p95)
+
+    async def _send_hedged(self, call: Callable[[], Awaitable[T]], tokens: int) -> T:
+        primary = asyncio.ensure_future(self._send(call))
+        tasks = {primary}
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                left = time_left()
+                if not done and (left is None or left > 0):
+                    self.hedged += 1
+                    tasks.add(asyncio.ensure_future(self._send_backup(call, tokens)))
+
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Every copy failed: surface the primary's error to the retry loop
+            return primary.result()
+        finally:
+            for task in (primary, *tasks):
+                task.cancel()
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "provider": self.name,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "queued_requests": len(self._queues),
+            "granted": self.granted,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failed": self.failed,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "request_budget": int(self._request_budget),
+            "token_budget": int(self._token_budget),
+        }
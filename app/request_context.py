@@ -0,0 +1,65 @@
+from contextvars import ContextVar
+from typing import Optional, Union
+import time
+
+
+# Set per HTTP request by the middleware in app.main; work started outside a request shares one key
+request_id: ContextVar[str] = ContextVar("request_id", default="background")
+
+# time.monotonic() by which the current request should answer (or the SharedDeadline
+# of work several requests wait on); None means no deadline
+deadline: ContextVar[Optional[Union[float, "SharedDeadline"]]] = ContextVar("deadline", default=None)
+
+deadline_stats = {
+    "partial_responses": 0,
+    "dropped_items": 0,
+}
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before this piece of work could finish."""
+
+
+class SharedDeadline:
+    """
+    Deadline of work shared by several callers (see app.coalesce): the latest
+    of its current waiters' deadlines, or none while any waiter has none.
+    Waiters may themselves be shared work, so their deadlines are resolved on
+    every read.
+    """
+
+    def __init__(self):
+        self.waiters: list[Optional[Union[float, "SharedDeadline"]]] = []
+
+    def at(self) -> Optional[float]:
+        latest = None
+        for waiter in self.waiters:
+            at = resolve(waiter)
+            if at is None:
+                return None
+            latest = at if latest is None else max(latest, at)
+        return latest
+
+
+def resolve(value: Optional[Union[float, SharedDeadline]]) -> Optional[float]:
+    return value.at() if isinstance(value, SharedDeadline) else value
+
+
+def start_deadline(seconds: Optional[float]):
+    """Give the current request `seconds` from now; None or <= 0 removes the deadline."""
+    deadline.set(time.monotonic() + seconds if seconds and seconds > 0 else None)
+
+
+def time_left() -> Optional[float]:
+    at = resolve(deadline.get())
+    return None if at is None else at - time.monotonic()
+
+
+def within_deadline(timeout: float) -> float:
+    """`timeout` capped to the time the request has left."""
+    left = time_left()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return min(timeout, left)
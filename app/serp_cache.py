@@ -0,0 +1,86 @@
+from typing import Awaitable, Callable, Optional
+from app.cache import TTLCache, make_key
+from app.coalesce import SingleFlight
+from app.request_context import deadline
+import app.config as config
+import asyncio
+import time
+
+
+class SerpCache:
+    """
+    Parsed Google News result pages keyed by (term, tbs window, hl, gl, safe,
+    page start). Pages younger than `freshness` are served as is; older ones
+    (up to the cache `ttl`) are served stale while one background request
+    refreshes them. Empty pages are not stored, since a block or captcha page
+    parses to nothing as well.
+    """
+
+    def __init__(
+        self,
+        freshness: float = config.SERP_CACHE_FRESHNESS,
+        ttl: float = config.SERP_CACHE_TTL,
+        max_items: int = config.SERP_CACHE_SIZE,
+        max_db_items: int = config.SERP_CACHE_DB_SIZE,
+    ):
+        self.freshness = freshness
+        self._cache = TTLCache("serp", max_items=max_items, ttl=ttl, max_db_items=max_db_items)
+        self._flight = SingleFlight("serp")
+        self._revalidations: set[asyncio.Task] = set()
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.fetches = 0
+
+    @staticmethod
+    def key(term: str, tbs: Optional[str], hl: Optional[str], gl: Optional[str], safe: str, start: int) -> str:
+        return make_key(term.strip().lower(), tbs, hl, gl, safe, start)
+
+    async def page(self, key: str, fetch: Callable[[], Awaitable[list]]) -> list:
+        """Results of one page, from the cache when possible; `fetch()` requests it from Google."""
+        entry = await self._cache.get_entry(key)
+        if entry is not None:
+            stored_at, results = entry
+            if time.time() - stored_at < self.freshness:
+                self.fresh_hits += 1
+            else:
+                self.stale_hits += 1
+                self._revalidate(key, fetch)
+            return results
+        return await self._flight.do(key, lambda: self._fetch(key, fetch))
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[list]]) -> list:
+        self.fetches += 1
+        results = await fetch()
+        if results:
+            await self._cache.set(key, results)
+        return results
+
+    def _revalidate(self, key: str, fetch: Callable[[], Awaitable[list]]):
+        async def refresh():
+            # The refresh outlives the request that noticed the stale page
+            deadline.set(None)
+            try:
+                await self._flight.do(key, lambda: self._fetch(key, fetch))
+            except Exception as e:
+                print(f"Refreshing a cached result page failed: {e}")
+
+        task = asyncio.create_task(refresh())
+        self._revalidations.add(task)
+        task.add_done_callback(self._revalidations.discard)
+
+    def close(self):
+        for task in self._revalidations:
+            task.cancel()
+        self._cache.close()
+
+    def stats(self) -> dict:
+        return {
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "fetches": self.fetches,
+            "revalidating": len(self._revalidations),
+            "cache": self._cache.stats(),
+        }
+
+
+serp_cache = SerpCache()
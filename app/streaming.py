@@ -0,0 +1,110 @@
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import AsyncIterator, Awaitable, Callable
+from app.request_context import DeadlineExceeded, deadline_stats, time_left
+import asyncio
+import json
+
+
+_DONE = object()
+
+
+async def merge_streams(*streams: AsyncIterator) -> AsyncIterator:
+    """Interleave several async iterators, yielding items as soon as any of them produces one."""
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump(stream: AsyncIterator):
+        try:
+            async for item in stream:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(_DONE)
+
+    tasks = [asyncio.create_task(pump(stream)) for stream in streams]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def until_deadline(stream: AsyncIterator) -> AsyncIterator:
+    """Pass items through until the request deadline, then stop and leave the stragglers behind."""
+    iterator = aiter(stream)
+    while True:
+        try:
+            item = await asyncio.wait_for(anext(iterator), time_left())
+        except StopAsyncIteration:
+            return
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            deadline_stats["partial_responses"] += 1
+            print("Request deadline reached, returning partial results")
+            return
+        yield item
+
+
+def check_format(format: str):
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {format}")
+
+
+def media_type(format: str) -> str:
+    return "text/event-stream" if format == "sse" else "application/x-ndjson"
+
+
+def encode_event(event: str, data: dict, format: str) -> str:
+    payload = json.dumps(data, ensure_ascii=False)
+    if format == "sse":
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({"event": event, **data}, ensure_ascii=False) + "\n"
+
+
+def stream_response(
+    stream: AsyncIterator[BaseModel],
+    finalize: Callable[[list], Awaitable[list]],
+    format: str = "ndjson",
+) -> StreamingResponse:
+    """
+    Send each item as an `item` event the moment it is ready, then a `done`
+    event whose `order` lists the item indices as sorted by `finalize`.
+
+    `format` is "ndjson" (one JSON object per line) or "sse" (text/event-stream).
+    """
+    check_format(format)
+
+    async def events():
+        items = []
+        try:
+            async for item in stream:
+                yield encode_event("item", {"index": len(items), "item": item.model_dump()}, format)
+                items.append(item)
+
+            ordered = await finalize(list(items))
+            positions = {id(item): index for index, item in enumerate(items)}
+            yield encode_event("done", {"order": [positions[id(item)] for item in ordered]}, format)
+        except Exception as e:
+            yield encode_event("error", {"detail": str(e)}, format)
+
+    return StreamingResponse(events(), media_type=media_type(format))
+
+
+def event_stream_response(events: AsyncIterator[dict], format: str = "ndjson") -> StreamingResponse:
+    """Stream already-built `{"event": ..., **data}` dicts (e.g. job progress)."""
+    check_format(format)
+
+    async def encoded():
+        async for event in events:
+            data = {k: v for k, v in event.items() if k != "event"}
+            yield encode_event(event["event"], data, format)
+
+    return StreamingResponse(encoded(), media_type=media_type(format))
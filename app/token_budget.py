@@ -0,0 +1,154 @@
+"""
+Keeps the text sent to the LLM within LLM_INPUT_BUDGET tokens.
+
+Over-long inputs keep their most informative paragraphs (lead paragraphs
+and ones mentioning funding, launches, partners, awards, figures) in their
+original order. With LLM_MAP_REDUCE on, inputs beyond
+LLM_MAP_REDUCE_THRESHOLD are first summarized chunk by chunk and the
+summaries are analyzed instead.
+"""
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+from app.prefilter import SIGNAL_WORDS
+from app.request_context import request_id
+from app.utils import estimate_tokens
+import app.config as config
+import asyncio
+import re
+
+
+FIGURES = re.compile(r"\d[\d,.]*\s*(%|million|billion|萬|億|m\b|bn\b)?|[$€£¥]", re.IGNORECASE)
+
+# Per-request counts for the most recent requests only
+MAX_TRACKED_REQUESTS = 200
+
+budget_totals = {
+    "texts": 0,
+    "truncated": 0,
+    "summarized": 0,
+    "summary_calls": 0,
+    "tokens_before": 0,
+    "tokens_after": 0,
+}
+request_tokens: OrderedDict[str, dict] = OrderedDict()
+
+
+def token_counter(provider: str, model: str) -> Callable[[str], int]:
+    """Exact counts for OpenAI models when tiktoken is installed, the rough estimate otherwise."""
+    if provider == "openai":
+        try:
+            import tiktoken
+        except ImportError:
+            return estimate_tokens
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=())) if text else 0
+    return estimate_tokens
+
+
+def paragraph_score(paragraph: str, position: int) -> float:
+    return (
+        2 * len(SIGNAL_WORDS.findall(paragraph))
+        + len(FIGURES.findall(paragraph)) / 2
+        + 3 / (1 + position)  # news leads carry the story
+    )
+
+
+def keep_informative(text: str, count: Callable[[str], int], budget: int) -> str:
+    """Best-scoring paragraphs of `text` that fit in `budget` tokens, in their original order."""
+    paragraphs = [p for p in text.split("\n") if p.strip()]
+    sizes = [count(p) for p in paragraphs]
+    ranked = sorted(range(len(paragraphs)), key=lambda i: paragraph_score(paragraphs[i], i), reverse=True)
+
+    chosen, used = set(), 0
+    for index in ranked:
+        if used + sizes[index] <= budget:
+            chosen.add(index)
+            used += sizes[index]
+
+    if not chosen and paragraphs:
+        # A single paragraph bigger than the whole budget: keep its beginning
+        best = paragraphs[ranked[0]]
+        return best[:max(1, len(best) * budget // sizes[ranked[0]])]
+    return "\n".join(paragraphs[i] for i in sorted(chosen))
+
+
+def split_chunks(text: str, count: Callable[[str], int], chunk_tokens: int) -> list[str]:
+    chunks, current, current_tokens = [], [], 0
+    for paragraph in text.split("\n"):
+        tokens = count(paragraph)
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(paragraph)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def record(tokens_before: int, tokens_after: int):
+    budget_totals["texts"] += 1
+    budget_totals["tokens_before"] += tokens_before
+    budget_totals["tokens_after"] += tokens_after
+
+    rid = request_id.get()
+    entry = request_tokens.pop(rid, None) or {"texts": 0, "tokens_before": 0, "tokens_after": 0}
+    entry["texts"] += 1
+    entry["tokens_before"] += tokens_before
+    entry["tokens_after"] += tokens_after
+    request_tokens[rid] = entry
+    while len(request_tokens) > MAX_TRACKED_REQUESTS:
+        request_tokens.popitem(last=False)
+
+
+async def fit_input(
+    text: str,
+    count: Callable[[str], int],
+    summarize: Optional[Callable[[str], Awaitable[str]]] = None,
+    budget: int = config.LLM_INPUT_BUDGET,
+) -> str:
+    """
+    Return `text` cut down to `budget` tokens. `summarize(chunk)` is the
+    analyzer's summary call, used for the map-reduce pass when enabled.
+    """
+    tokens_before = count(text)
+    if budget <= 0 or tokens_before <= budget:
+        record(tokens_before, tokens_before)
+        return text
+
+    if summarize and config.LLM_MAP_REDUCE and tokens_before > config.LLM_MAP_REDUCE_THRESHOLD:
+        chunks = split_chunks(text, count, config.LLM_MAP_REDUCE_CHUNK)
+        summaries = await asyncio.gather(*(summarize(chunk) for chunk in chunks))
+        budget_totals["summarized"] += 1
+        budget_totals["summary_calls"] += len(chunks)
+        text = "\n".join(summary.strip() for summary in summaries)
+
+    if count(text) > budget:
+        budget_totals["truncated"] += 1
+        text = keep_informative(text, count, budget)
+    record(tokens_before, count(text))
+    return text
+
+
+def truncate_to_budget(text: str, count: Callable[[str], int], budget: int = config.LLM_INPUT_BUDGET) -> str:
+    """fit_input without the map-reduce pass, for synchronous callers such as batch file building."""
+    tokens_before = count(text)
+    if 0 < budget < tokens_before:
+        budget_totals["truncated"] += 1
+        text = keep_informative(text, count, budget)
+        record(tokens_before, count(text))
+    else:
+        record(tokens_before, tokens_before)
+    return text
+
+
+def budget_stats() -> dict:
+    saved = budget_totals["tokens_before"] - budget_totals["tokens_after"]
+    return {
+        **budget_totals,
+        "tokens_saved": saved,
+        "requests": dict(request_tokens),
+    }
@@ -43,6 +43,14 @@ def get_date_from_url(linkedin_url):
     return dates['dateUTC']
 
 
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~4 ASCII characters per token, one token per CJK or other wide character."""
+    if not text:
+        return 0
+    wide = sum(1 for ch in text if ord(ch) > 0x2E80)
+    return (len(text) - wide) // 4 + wide + 1
+
+
 def parse_str_to_dict(response: str) -> dict:
     """Parse the ChatGPT response string into a dictionary.
     
@@ -65,6 +73,26 @@ def parse_str_to_dict(response: str) -> dict:
         }
 
 
+# The categories the prompts allow, in the order results are sorted by
+CATEGORY_PRIORITY = {
+    'Fund-raised': 0,
+    'Business Collaboration': 1,
+    'Product-launched': 2,
+    'Awards': 3,
+    'Activities': 4,
+    'None': 5
+}
+
+
+def is_valid_analysis(response: str) -> bool:
+    """Check whether an LLM response parses to an object with one of the known categories, so it is safe to keep."""
+    try:
+        parsed = json.loads(response.replace('```json', '').replace('```', '').strip())
+    except (json.JSONDecodeError, AttributeError):
+        return False
+    return isinstance(parsed, dict) and parsed.get("Category") in CATEGORY_PRIORITY
+
+
 def parse_linkedin_url(raw_url: str) -> str:
     """
     Smartly normalize LinkedIn URLs to the format https://www.linkedin.com/company/foo/
@@ -0,0 +1,101 @@
+"""
+Check that every installed HTML parser backend extracts the same SERP results
+and article text as html.parser, and time them, on a directory of saved pages.
+Exits with status 1 when any backend's output differs.
+
+    python scripts/bench_html_parsers.py                            # the small corpus in scripts/html_corpus
+    python scripts/bench_html_parsers.py corpus/
+    python scripts/bench_html_parsers.py corpus/ --fetch urls.txt   # download pages into corpus/ first
+
+Pages containing Google's `ezO2md` result blocks are treated as result pages,
+everything else as articles.
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import hashlib
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Hand-written pages covering the extraction edge cases: content selectors, noise tags, no <body>, CJK
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "html_corpus"
+
+from app.html_parser import available_backends, extract_article_text, extract_serp_results  # noqa: E402
+
+
+async def fetch_corpus(urls_file: Path, corpus: Path):
+    from fake_headers import Headers
+    import httpx
+
+    corpus.mkdir(parents=True, exist_ok=True)
+    urls = [line.strip() for line in urls_file.read_text().splitlines() if line.strip()]
+    async with httpx.AsyncClient(follow_redirects=True, timeout=15) as client:
+        for url in urls:
+            try:
+                resp = await client.get(url, headers=Headers().generate())
+                resp.raise_for_status()
+            except Exception as e:
+                print(f"skip {url}: {e}")
+                continue
+            name = hashlib.sha1(url.encode()).hexdigest()[:16] + ".html"
+            (corpus / name).write_text(resp.text, encoding="utf-8")
+            print(f"saved {url} -> {name}")
+
+
+def extract(html: str, backend: str):
+    if "ezO2md" in html:
+        return extract_serp_results(html, backend)
+    return extract_article_text(html, backend)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=Path, nargs="?", default=DEFAULT_CORPUS, help="directory of .html files")
+    parser.add_argument("--fetch", type=Path, help="file with one URL per line to download into the corpus first")
+    parser.add_argument("--repeat", type=int, default=5, help="parses per page and backend for timing")
+    args = parser.parse_args()
+
+    if args.fetch:
+        asyncio.run(fetch_corpus(args.fetch, args.corpus))
+
+    pages = sorted(args.corpus.glob("*.html"))
+    if not pages:
+        sys.exit(f"No .html files in {args.corpus}")
+
+    backends = available_backends()
+    timings = {backend: [] for backend in backends}
+    mismatches = {backend: [] for backend in backends}
+
+    for page in pages:
+        html = page.read_text(encoding="utf-8", errors="replace")
+        reference = extract(html, "html.parser")
+        for backend in backends:
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                output = extract(html, backend)
+            timings[backend].append((time.perf_counter() - started) / args.repeat * 1000)
+            if output != reference:
+                mismatches[backend].append(page.name)
+
+    print(f"{len(pages)} pages, {args.repeat} parses each\n")
+    print(f"{'backend':<12} {'mean ms':>9} {'median ms':>10} {'p95 ms':>8} {'speedup':>8} {'parity':>8}")
+    baseline = statistics.mean(timings["html.parser"])
+    for backend in backends:
+        values = sorted(timings[backend])
+        mean = statistics.mean(values)
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        parity = f"{len(pages) - len(mismatches[backend])}/{len(pages)}"
+        print(f"{backend:<12} {mean:>9.2f} {statistics.median(values):>10.2f} {p95:>8.2f} {baseline / mean:>7.1f}x {parity:>8}")
+
+    for backend, names in mismatches.items():
+        if names:
+            print(f"\n{backend} differs from html.parser on: {', '.join(names)}")
+    if any(mismatches.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
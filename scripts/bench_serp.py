@@ -0,0 +1,92 @@
+"""
+Time googlesearch_async.search with different numbers of concurrently
+fetched result pages, and check they all return the same results in the
+same order. Run it against the canned result pages of tests.fake_serp_server:
+
+    uvicorn tests.fake_serp_server:app --port 8002
+    python scripts/bench_serp.py --url http://127.0.0.1:8002/search
+
+Each run is done twice:
+
+- "fixture": per-host spacing off and the per-host cap raised to the
+  largest page count, which measures the concurrency alone
+- "shipped": the configured HTTP_MAX_PER_HOST / HTTP_HOST_SPACING, which
+  apply to google.com too, so this is the speedup production sees
+
+The SERP cache is off so every run fetches.
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+async def run(term: str, num_results: int, concurrent_pages: int) -> tuple[float, list[str]]:
+    from app.googlesearch_async import search
+
+    started = time.perf_counter()
+    links = [link async for link in search(term, num_results=num_results, concurrent_pages=concurrent_pages)]
+    return time.perf_counter() - started, links
+
+
+def host_limits(mode: str, concurrency: list[int]) -> tuple[int, float]:
+    import app.config as config
+
+    if mode == "fixture":
+        return max(concurrency), 0.0
+    return config.HTTP_MAX_PER_HOST, config.HTTP_HOST_SPACING
+
+
+async def bench(sizes: list[int], concurrency: list[int], repeat: int, modes: list[str]):
+    from app.http_client import http_client
+
+    for mode in modes:
+        http_client.max_per_host, http_client.host_spacing = host_limits(mode, concurrency)
+        http_client._hosts.clear()  # per-host semaphores are sized when a host is first seen
+        print(f"\n{mode}: {http_client.max_per_host} per host, {http_client.host_spacing}s spacing")
+        await bench_sizes(sizes, concurrency, repeat)
+    await http_client.aclose()
+
+
+async def bench_sizes(sizes: list[int], concurrency: list[int], repeat: int):
+    print(f"{'results':>8} {'pages':>6} {'mean s':>8} {'median s':>9} {'speedup':>8}  same results")
+    for num_results in sizes:
+        baseline = None
+        for pages in concurrency:
+            timings, links = [], None
+            for _ in range(repeat):
+                elapsed, links = await run("acme", num_results, pages)
+                timings.append(elapsed)
+            mean = statistics.mean(timings)
+            if baseline is None:
+                baseline = (mean, links)
+            same = "yes" if links == baseline[1] else "NO"
+            print(f"{num_results:>8} {pages:>6} {mean:>8.2f} {statistics.median(timings):>9.2f} "
+                  f"{baseline[0] / mean:>7.1f}x  {same} ({len(links)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8002/search", help="search endpoint to query")
+    parser.add_argument("--results", type=int, nargs="+", default=[10, 30, 50], help="num_results values to try")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 3, 5], help="concurrent_pages values; the first is the baseline")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--limits", choices=["fixture", "shipped"], nargs="+", default=["fixture", "shipped"],
+                        help="per-host limits to run with")
+    args = parser.parse_args()
+
+    # app.config reads these at import time
+    os.environ["GOOGLE_SEARCH_URL"] = args.url
+    # Every run after the first would otherwise be served from the SERP cache
+    os.environ.setdefault("SERP_CACHE_ENABLED", "0")
+
+    asyncio.run(bench(args.results, args.pages, args.repeat, args.limits))
+
+
+if __name__ == "__main__":
+    main()
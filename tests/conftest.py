@@ -0,0 +1,16 @@
+"""
+Shared test setup: the repo root on sys.path, caches kept in memory only, and
+a dummy OpenAI key, since app.openai_analyzer reads ./.env when imported.
+"""
+from pathlib import Path
+import os
+import sys
+import tempfile
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ["CACHE_DB_PATH"] = ""
+_workdir = tempfile.mkdtemp(prefix="gplus-tests-")
+Path(_workdir, ".env").write_text("OPENAI_API_KEY=test-key\n")
+os.chdir(_workdir)
@@ -0,0 +1,138 @@
+"""
+Minimal stand-in for the OpenAI Files + Batches API, for exercising
+app.batch_analyzer without a real account:
+
+    uvicorn tests.fake_batch_server:app --port 8001
+    python -m app.batch_analyzer posts.json --base-url http://127.0.0.1:8001/v1 --poll-interval 1
+
+Batches complete on the first status poll. Every request gets a canned reply
+built by `fake_reply`; replace it to script specific outputs.
+"""
+from email.parser import BytesParser
+from email.policy import HTTP
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+import json
+import time
+import uuid
+
+
+app = FastAPI()
+
+files: dict[str, dict] = {}
+file_contents: dict[str, bytes] = {}
+batches: dict[str, dict] = {}
+
+
+def fake_reply(body: dict) -> str:
+    return json.dumps({
+        "Headline": body["input"].strip().strip('"').strip().splitlines()[0][:60],
+        "Content": "",
+        "Headline-zh-tw": "",
+        "Content-zh-tw": "",
+        "Category": "None",
+    })
+
+
+def save_file(filename: str, content: bytes, purpose: str) -> dict:
+    file_id = f"file-{uuid.uuid4().hex}"
+    files[file_id] = {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(content),
+        "created_at": int(time.time()),
+        "filename": filename,
+        "purpose": purpose,
+        "status": "processed",
+    }
+    file_contents[file_id] = content
+    return files[file_id]
+
+
+def parse_multipart(content_type: str, body: bytes) -> dict[str, tuple[str, bytes]]:
+    message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    parts = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        parts[name] = (part.get_filename() or "", part.get_payload(decode=True))
+    return parts
+
+
+def complete(batch: dict):
+    output = []
+    for line in file_contents[batch["input_file_id"]].decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        output.append(json.dumps({
+            "id": f"batch_req_{uuid.uuid4().hex}",
+            "custom_id": request["custom_id"],
+            "response": {
+                "status_code": 200,
+                "request_id": uuid.uuid4().hex,
+                "body": {
+                    "object": "response",
+                    "model": request["body"]["model"],
+                    "output": [{
+                        "type": "message",
+                        "role": "assistant",
+                        "content": [{"type": "output_text", "text": fake_reply(request["body"]), "annotations": []}],
+                    }],
+                },
+            },
+            "error": None,
+        }))
+    output_file = save_file(f"{batch['id']}_output.jsonl", ("\n".join(output) + "\n").encode("utf-8"), "batch_output")
+    now = int(time.time())
+    batch.update({
+        "status": "completed",
+        "output_file_id": output_file["id"],
+        "in_progress_at": now,
+        "finalizing_at": now,
+        "completed_at": now,
+        "request_counts": {"total": len(output), "completed": len(output), "failed": 0},
+    })
+
+
+@app.post("/v1/files")
+async def create_file(request: Request):
+    parts = parse_multipart(request.headers["content-type"], await request.body())
+    filename, content = parts["file"]
+    return save_file(filename, content, parts["purpose"][1].decode())
+
+
+@app.get("/v1/files/{file_id}/content")
+async def file_content(file_id: str):
+    if file_id not in file_contents:
+        raise HTTPException(status_code=404, detail="No such file")
+    return PlainTextResponse(file_contents[file_id].decode("utf-8"))
+
+
+@app.post("/v1/batches")
+async def create_batch(request: Request):
+    params = await request.json()
+    if params["input_file_id"] not in file_contents:
+        raise HTTPException(status_code=400, detail="No such file")
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    batches[batch_id] = {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": params["endpoint"],
+        "input_file_id": params["input_file_id"],
+        "completion_window": params["completion_window"],
+        "status": "validating",
+        "created_at": int(time.time()),
+        "metadata": params.get("metadata"),
+        "request_counts": {"total": 0, "completed": 0, "failed": 0},
+    }
+    return batches[batch_id]
+
+
+@app.get("/v1/batches/{batch_id}")
+async def retrieve_batch(batch_id: str):
+    if batch_id not in batches:
+        raise HTTPException(status_code=404, detail="No such batch")
+    batch = batches[batch_id]
+    if batch["status"] == "validating":
+        complete(batch)
+    return batch
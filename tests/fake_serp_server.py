@@ -0,0 +1,46 @@
+"""
+Canned Google News result pages, for benchmarking app.googlesearch_async.search
+without hitting Google:
+
+    uvicorn tests.fake_serp_server:app --port 8002
+    GOOGLE_SEARCH_URL=http://127.0.0.1:8002/search python scripts/bench_serp.py
+
+Every query has FAKE_SERP_RESULTS results, served 10 per page after
+FAKE_SERP_LATENCY seconds; pages past the end are empty. The markup mirrors
+the basic-HTML result blocks that app.html_parser extracts.
+"""
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse
+from html import escape
+from urllib.parse import quote
+import asyncio
+import os
+
+
+LATENCY = float(os.getenv("FAKE_SERP_LATENCY", "0.3"))
+TOTAL_RESULTS = int(os.getenv("FAKE_SERP_RESULTS", "100"))
+PAGE_SIZE = 10
+
+app = FastAPI()
+
+
+def result_block(query: str, index: int) -> str:
+    url = f"https://news{index % 7}.example/{quote(query)}/{index}"
+    return (
+        '<div class="ezO2md">'
+        f'<a href="/url?q={url}&amp;sa=U&amp;ved=x"><span class="CVA68e qXLe6d">{escape(query)} story {index}</span></a>'
+        '<table><tr><td><span class="FrIlee"><span class="fYyStc">'
+        f'{escape(query)} description {index} ' + 'lorem ipsum ' * 15 +
+        '</span></span></td></tr></table></div>'
+    )
+
+
+@app.get("/search", response_class=HTMLResponse)
+async def search(q: str = "", start: int = 0):
+    await asyncio.sleep(LATENCY)
+    blocks = "".join(result_block(q, i) for i in range(start, min(start + PAGE_SIZE, TOTAL_RESULTS)))
+    return (
+        "<!doctype html><html><head><style>.x{}</style></head><body>"
+        f'<header>Google</header><div id="main">{blocks}</div><footer>footer</footer>'
+        "</body></html>"
+    )
@@ -0,0 +1,44 @@
+import asyncio
+import json
+
+import app.openai_analyzer as openai_analyzer
+from app.cache import analysis_cache
+from app.utils import is_valid_analysis
+
+
+def reply(category: str) -> str:
+    return json.dumps({"Headline": "h", "Content": "c", "Category": category})
+
+
+def test_is_valid_analysis():
+    assert is_valid_analysis(reply("Fund-raised"))
+    assert is_valid_analysis("```json\n" + reply("None") + "\n```")
+    assert not is_valid_analysis(reply("Partnership"))
+    assert not is_valid_analysis(json.dumps({"Headline": "h"}))
+    assert not is_valid_analysis("[1, 2]")
+    assert not is_valid_analysis("Sorry, I cannot help with that.")
+
+
+def test_replies_with_unknown_category_are_not_cached(monkeypatch):
+    replies = [reply("Partnership"), reply("Awards")]
+    calls = []
+
+    async def fake_call(prompt, output_tokens=None, instructions=None):
+        calls.append(prompt)
+        return replies[len(calls) - 1]
+
+    monkeypatch.setattr(openai_analyzer, "call_openai_api", fake_call)
+    text = "Acme won the Example Innovation Award for its autonomous forklift. " * 3
+
+    async def run():
+        first = await openai_analyzer.analyze_posts(text, "en")
+        second = await openai_analyzer.analyze_posts(text, "en")
+        third = await openai_analyzer.analyze_posts(text, "en")
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first == reply("Partnership")
+    # The bad reply was not cached, so the LLM was asked again; the good one then was
+    assert second == third == reply("Awards")
+    assert len(calls) == 2
+    assert asyncio.run(analysis_cache.get(openai_analyzer.analysis_key(text, "en"))) == reply("Awards")
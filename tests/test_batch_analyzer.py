@@ -0,0 +1,53 @@
+"""app.batch_analyzer against tests.fake_batch_server, served in-process over an ASGI transport."""
+import asyncio
+import json
+
+import httpx
+from openai import AsyncOpenAI
+
+import app.openai_analyzer as openai_analyzer
+from app.batch_analyzer import analyze_posts_batch
+from app.cache import analysis_cache
+from tests import fake_batch_server
+
+
+def fake_client() -> AsyncOpenAI:
+    transport = httpx.ASGITransport(app=fake_batch_server.app)
+    return AsyncOpenAI(
+        api_key="test-key",
+        base_url="http://fake-batch/v1",
+        http_client=httpx.AsyncClient(transport=transport, base_url="http://fake-batch/v1"),
+    )
+
+
+def test_results_map_back_by_custom_id_and_are_cached():
+    items = {
+        f"https://news.example/{i}": f"Acme story number {i} about a partnership with Example Corp."
+        for i in range(5)
+    }
+    already_cached = "https://news.example/0"
+    cached_reply = json.dumps({"Headline": "from cache", "Category": "Business Collaboration"})
+
+    async def run():
+        await analysis_cache.set(openai_analyzer.analysis_key(items[already_cached], "en"), cached_reply)
+        requests_before = len(fake_batch_server.file_contents)
+        results = await analyze_posts_batch(items, "en", client=fake_client(), poll_interval=0)
+        cached = {
+            item_id: await analysis_cache.get(openai_analyzer.analysis_key(text, "en"))
+            for item_id, text in items.items()
+        }
+        return results, cached, len(fake_batch_server.file_contents) - requests_before
+
+    results, cached, files_created = asyncio.run(run())
+
+    assert set(results) == set(items)
+    assert results[already_cached] == cached_reply
+    for item_id, text in items.items():
+        if item_id != already_cached:
+            # The fake echoes the first line of each request's input as the headline
+            assert json.loads(results[item_id])["Headline"] == text[:60]
+        assert cached[item_id] == results[item_id]
+    # One input file and one output file for the single batch
+    assert files_created == 2
+    batch_input = list(fake_batch_server.file_contents.values())[-2].decode("utf-8").splitlines()
+    assert {json.loads(line)["custom_id"] for line in batch_input} == set(items) - {already_cached}
@@ -0,0 +1,73 @@
+"""BrowserPool with fake browsers: launch failures and concurrent relaunches."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.browser_pool import BrowserPool, PooledBrowser
+
+
+class FakeContext:
+    pages = []
+
+    def on(self, event, handler):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self, connected: bool = True):
+        self.connected = connected
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def close(self):
+        self.connected = False
+
+    async def new_context(self, **options):
+        return FakeContext()
+
+
+class FakePool(BrowserPool):
+    """Launches FakeBrowsers, slowly, and counts them; no Playwright involved."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.launches = 0
+
+    async def _launch(self):
+        self.launches += 1
+        await asyncio.sleep(0.05)
+        return FakeBrowser()
+
+
+def test_app_starts_when_the_browser_cannot_launch(monkeypatch):
+    async def no_browser():
+        raise RuntimeError("Executable doesn't exist at /ms-playwright/chromium")
+
+    monkeypatch.setattr(main.browser_pool, "_launch", no_browser)
+    with TestClient(main.app) as client:
+        assert client.get("/stats").status_code == 200
+        # Left unstarted, so the first LinkedIn scrape tries again
+        assert main.browser_pool._playwright is None
+
+
+def test_only_one_borrower_relaunches_a_disconnected_browser():
+    pool = FakePool(size=1, contexts_per_browser=4)
+    pool._playwright = object()  # started
+    pool._browsers = [PooledBrowser(FakeBrowser(connected=False))]
+
+    async def borrow():
+        async with pool.context():
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(borrow() for _ in range(4)))
+
+    asyncio.run(main())
+    assert pool.launches == 1
+    assert pool.stats()["recycled"] == 1
+    assert pool._browsers[0].ready and pool._browsers[0].active == 0
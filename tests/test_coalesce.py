@@ -0,0 +1,86 @@
+"""Shared work runs under the latest deadline of its waiters and stops when they all give up."""
+import asyncio
+
+import pytest
+
+from app.coalesce import SingleFlight, TaskMemo
+from app.request_context import DeadlineExceeded, start_deadline, time_left
+
+
+async def call(do, seconds, work, delay=0.0):
+    await asyncio.sleep(delay)
+    start_deadline(seconds)
+    try:
+        return await do("key", work)
+    except DeadlineExceeded:
+        return "deadline"
+
+
+def test_work_sees_the_waiters_deadline():
+    seen = []
+
+    async def work():
+        seen.append(time_left())
+        return "done"
+
+    async def main():
+        return await call(SingleFlight("test").do, 5, work)
+
+    assert asyncio.run(main()) == "done"
+    assert seen[0] is not None and 4 < seen[0] <= 5
+
+
+@pytest.mark.parametrize("flight", [lambda: SingleFlight("test").do, lambda: TaskMemo().run])
+def test_each_caller_waits_until_its_own_deadline(flight):
+    seen = []
+
+    async def work():
+        await asyncio.sleep(0.3)
+        seen.append(time_left())
+        return "done"
+
+    async def main():
+        do = flight()
+        return await asyncio.gather(call(do, 0.1, work), call(do, 30, work, delay=0.01))
+
+    assert asyncio.run(main()) == ["deadline", "done"]
+    # The work kept the later deadline, not that of the caller that started it
+    assert seen[0] > 20
+
+
+def test_caller_without_deadline_lifts_it_for_the_shared_work():
+    seen = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        seen.append(time_left())
+        return "done"
+
+    async def main():
+        do = SingleFlight("test").do
+        return await asyncio.gather(call(do, 1, work), call(do, None, work, delay=0.01))
+
+    assert asyncio.run(main()) == ["done", "done"]
+    assert seen == [None]
+
+
+def test_work_is_cancelled_once_every_waiter_gave_up():
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.3)
+        finished.append(True)
+        return "done"
+
+    async def main():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(call(flight.do, 0.05, work), call(flight.do, 0.1, work, delay=0.01))
+        await asyncio.sleep(0.4)
+        # A later caller starts the work afresh instead of joining the cancelled call
+        results.append(await call(flight.do, 5, work))
+        return results, flight.stats()
+
+    results, stats = asyncio.run(main())
+    assert results == ["deadline", "deadline", "done"]
+    assert finished == [True]
+    assert stats["calls"] == 2 and stats["abandoned"] == 1
@@ -0,0 +1,19 @@
+"""Extraction workers start from a fresh interpreter rather than a fork of the app."""
+import asyncio
+
+from app.extraction_pool import ExtractionPool
+
+PAGE = b"<html><body><article><p>" + b"Funding round announced. " * 50 + b"</p></article></body></html>"
+
+
+def test_workers_are_not_forked_and_extract():
+    pool = ExtractionPool(workers=1)
+
+    async def main():
+        return await pool.extract_article(PAGE, "utf-8")
+
+    try:
+        assert pool.executor._mp_context.get_start_method() in ("forkserver", "spawn")
+        assert "Funding round announced." in asyncio.run(main())
+    finally:
+        pool.close()
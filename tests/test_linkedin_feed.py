@@ -0,0 +1,81 @@
+"""Stored LinkedIn posts: where scrolling stops, and which stored analyses are reused."""
+from datetime import datetime
+import asyncio
+import json
+
+import pytest
+
+import app.main as main
+from app.feed_store import feed_store
+from app.linkedin_scraper import harvest_posts
+from app.models import PostData
+from app.utils import get_post_id
+
+
+def post_url(month: int, day: int) -> str:
+    # LinkedIn post ids carry their creation time (ms) in the top 41 bits
+    ms = int(datetime(datetime.now().year, month, day, 12).timestamp() * 1000)
+    return f"https://www.linkedin.com/feed/update/urn:li:activity:{ms << 22:019d}"
+
+
+class FakeFeedPage:
+    """Hands out the feed two cards per scroll step, newest first, like HARVEST_JS."""
+
+    def __init__(self, urls: list[str]):
+        self.urls = urls
+        self.served = 0
+
+    async def evaluate(self, script, selector):
+        cards = [{"url": url, "text": url, "img_links": []} for url in self.urls[self.served:self.served + 2]]
+        self.served += len(cards)
+        return {"cards": cards, "total": self.served}
+
+    async def wait_for_function(self, *args, **kwargs):
+        pass
+
+
+FEED = [post_url(m, d) for m, d in [(5, 20), (5, 10), (5, 2), (4, 25), (4, 15), (4, 3), (3, 28)]]
+
+
+def harvest(month: int, known: list[str]) -> list[str]:
+    posts = asyncio.run(harvest_posts(FakeFeedPage(FEED), month, {get_post_id(url) for url in known}))
+    return [post.url for post in posts]
+
+
+@pytest.mark.skipif(datetime.now().month < 5, reason="the fake feed is dated May of the current year")
+def test_stored_posts_of_a_later_month_do_not_stop_the_scrape():
+    assert harvest(4, known=FEED[:3]) == FEED[3:6]
+    assert harvest(4, known=[]) == FEED[3:6]
+
+
+@pytest.mark.skipif(datetime.now().month < 5, reason="the fake feed is dated May of the current year")
+def test_stored_post_of_the_requested_month_stops_the_scrape():
+    # The batch holding the stored post is still read, then scrolling stops
+    assert harvest(4, known=FEED[:3] + [FEED[4]]) == [FEED[3], FEED[5]]
+
+
+def test_unusable_replies_are_not_stored_or_reused():
+    company = "https://www.linkedin.com/company/acme-feed-test/"
+    month = datetime.now().month
+    url = post_url(month, 1)
+    text = "Acme Robotics closed its Series B round led by Example Ventures, and will hire forty engineers."
+    replies = [json.dumps({"Headline": "h"}), json.dumps({"Headline": "h", "Category": "Fund-raised"})]
+    calls = []
+
+    async def scrape(linkedin_url, month, known_ids):
+        return [] if get_post_id(url) in known_ids else [PostData(url=url, text=text, img_links=[])]
+
+    async def analyze(post_text, language):
+        calls.append(post_text)
+        return replies[min(len(calls), len(replies)) - 1]
+
+    async def run() -> list[str]:
+        req = main.LIRequest(linkedin_url=company, month=month, language="en")
+        return [item.category async for item in main.stream_linkedin(req, scrape, analyze)]
+
+    assert asyncio.run(run()) == [""]  # the first reply had no category
+    assert asyncio.run(run()) == ["Fund-raised"]  # so it was analyzed again
+    assert asyncio.run(run()) == ["Fund-raised"]  # and the good reply reused
+    assert len(calls) == 2
+    stored = asyncio.run(feed_store.load(company))[get_post_id(url)]
+    assert json.loads(stored["analyses"]["en"])["Category"] == "Fund-raised"
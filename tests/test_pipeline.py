@@ -0,0 +1,37 @@
+"""A stage with `ready_in` keeps its workers busy on other hosts while one host is at its cap."""
+import asyncio
+import time
+
+from app.http_client import SharedClient
+from app.pipeline import Stage, run_pipeline
+
+SLOW = [f"https://slow.example/{i}" for i in range(10)]
+FAST = [f"https://fast{i}.example/" for i in range(10)]
+
+
+def fast_hosts_done_after(use_ready_in: bool) -> float:
+    client = SharedClient(max_per_host=2, host_spacing=0, http2=False)
+
+    async def fetch(url):
+        async with client.host_slot(url):
+            await asyncio.sleep(0.2 if url in SLOW else 0.01)
+        return url
+
+    async def main():
+        ready_in = client.host_ready_in if use_ready_in else None
+        started = time.monotonic()
+        finished = {}
+        async for url in run_pipeline(SLOW + FAST, [Stage("fetch", fetch, 4, ready_in=ready_in)]):
+            finished[url] = time.monotonic() - started
+        assert set(finished) == set(SLOW + FAST)
+        return max(finished[url] for url in FAST)
+
+    return asyncio.run(main())
+
+
+def test_fast_hosts_do_not_wait_behind_a_capped_host():
+    assert fast_hosts_done_after(use_ready_in=True) < 0.15
+
+
+def test_without_ready_in_fast_hosts_queue_behind_the_capped_host():
+    assert fast_hosts_done_after(use_ready_in=False) > 0.5
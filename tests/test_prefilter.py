@@ -0,0 +1,35 @@
+import pytest
+
+from app.prefilter import has_signal
+from app.token_budget import paragraph_score
+
+
+@pytest.mark.parametrize("text", [
+    "Acme closed a $20 million Series B round led by Example Ventures.",
+    "The startup raised fresh funding from angel investors.",
+    "Acme partners with Example Corp on warehouse robots.",
+    "The company launched its first autonomous forklift.",
+    "Acme introduces a new line of sensors.",
+    "Acme won the Example Innovation Award.",
+    "Acme will expand into Japan next year.",
+    "艾克米宣布完成 B 輪融資",
+])
+def test_signal(text):
+    assert has_signal(text)
+
+
+@pytest.mark.parametrize("text", [
+    "The office is around the corner from the station.",
+    "Some background on the weather this week.",
+    "A fundamental question about spreadsheets.",
+    "The suspect was introduced to investigators on Monday.",
+    "A profound discussion about the groundwork for the playground.",
+    "He said the contractual wording was unclear.",
+])
+def test_no_signal(text):
+    assert not has_signal(text)
+
+
+def test_paragraph_score_counts_whole_words():
+    # Both are the lead paragraph, so only the signal words differ
+    assert paragraph_score("Acme raised a seed round.", 0) > paragraph_score("Background around the fundamentals.", 0)
@@ -0,0 +1,51 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from app.rate_limiter import LLMScheduler, is_retryable
+
+REQUEST = httpx.Request("POST", "https://api.example/v1/responses")
+
+
+def status_error(status: int) -> openai.APIStatusError:
+    return openai.APIStatusError("error", response=httpx.Response(status, request=REQUEST), body=None)
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (openai.APIConnectionError(request=REQUEST), True),
+    (openai.APITimeoutError(request=REQUEST), True),
+    (httpx.ConnectError("connection refused"), True),
+    (httpx.ReadTimeout("timed out"), True),
+    (status_error(503), True),
+    (status_error(429), True),
+    (status_error(400), False),
+    (ValueError("bad prompt"), False),
+])
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
+
+
+def test_network_errors_are_retried():
+    scheduler = LLMScheduler("test", rpm=1000, tpm=1_000_000, max_retries=2, backoff_base=0.01, hedge=False)
+    errors = [openai.APIConnectionError(request=REQUEST), httpx.ReadTimeout("timed out")]
+
+    async def call():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert asyncio.run(scheduler.run(call, tokens=10)) == "ok"
+    assert scheduler.retries == 2 and scheduler.failed == 0
+
+
+def test_other_errors_are_not_retried():
+    scheduler = LLMScheduler("test", rpm=1000, tpm=1_000_000, max_retries=2, backoff_base=0.01, hedge=False)
+
+    async def call():
+        raise status_error(400)
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(scheduler.run(call, tokens=10))
+    assert scheduler.retries == 0 and scheduler.failed == 1
@@ -0,0 +1,18 @@
+"""Each response carries the id its request ran under, the key of its /stats entries."""
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.request_context import request_id
+
+
+def test_response_carries_the_request_id(monkeypatch):
+    seen = []
+    stats = main.browser_pool.stats
+    monkeypatch.setattr(main.browser_pool, "stats", lambda: seen.append(request_id.get()) or stats())
+
+    client = TestClient(main.app)
+    first = client.get("/stats").headers["X-Request-ID"]
+    second = client.get("/stats").headers["X-Request-ID"]
+
+    assert seen == [first, second]
+    assert first != second